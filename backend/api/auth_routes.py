@@ -20,7 +20,7 @@ async def login(
     session: AsyncSession = Depends(get_session)
 ):
     result = await session.execute(
-        select(User).where(User.email == data.email)
+        select(User).where(User.email == data.email, User.status == "active")
     )
     user = result.scalar_one_or_none()
 
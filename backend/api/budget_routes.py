@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import date, datetime
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from database.session import get_session
+from database.data_module import User
+from auth.security import get_current_user
+from services.budget_service import get_budget_progress
+
+budget_router = APIRouter(prefix="/budgets", tags=["Budgets"])
+
+
+class BudgetProgress(BaseModel):
+    id: UUID
+    name: str
+    start_date: date
+    end_date: date
+    total_amount: Decimal | None
+    spent_amount: Decimal
+    remaining_amount: Decimal | None
+    transaction_count: int
+    elapsed_days: int
+    total_days: int
+    daily_burn_rate: Decimal
+    projected_amount: Decimal
+    daily_allowance: Decimal | None
+    refreshed_at: datetime | None
+
+
+@budget_router.get("/progress", response_model=list[BudgetProgress])
+async def budget_progress(
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    today = datetime.now(ZoneInfo(current_user.timezone or "America/Sao_Paulo")).date()
+
+    return await get_budget_progress(
+        session,
+        user_id=current_user.id,
+        today=today
+    )
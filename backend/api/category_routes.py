@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import date
+from decimal import Decimal
+
+from database.session import get_session
+from database.data_module import User
+from auth.security import get_current_user
+from services.category_service import get_category_rollup
+
+category_router = APIRouter(prefix="/categories", tags=["Categories"])
+
+
+class CategoryTotal(BaseModel):
+    category_id: UUID
+    name: str
+    parent_category_id: UUID | None
+    depth: int
+    total_amount: Decimal
+    transaction_count: int
+
+
+class CategoryRollup(BaseModel):
+    category_id: UUID
+    name: str
+    start_date: date | None
+    end_date: date | None
+    total_amount: Decimal
+    transaction_count: int
+    categories: list[CategoryTotal]
+
+
+@category_router.get("/{category_id}/rollup", response_model=CategoryRollup)
+async def category_rollup(
+    category_id: UUID,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    rollup = await get_category_rollup(
+        session,
+        user_id=current_user.id,
+        category_id=category_id,
+        start_date=start_date,
+        end_date=end_date
+    )
+
+    if not rollup:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Category not found"
+        )
+
+    return rollup
@@ -1,19 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
+from typing import Any
 from uuid import UUID
 
-from services.chat_service import ChatService
-from services.llm_client import LLMClient
+from services.chat_service import ChatService, clean_sql
+from services.llm_router import LLMRouter, get_llm_router
+from services.llm_resilience import LLMTimeoutError, LLMUnavailableError
+from services.sql_executor import execute_plan, execute_sql
+from services.sql_guard import QueryRejected
 from auth.security import get_current_user
 from database.data_module import User
+from database.session import get_session
 
 chat_router = APIRouter(prefix="/chat", tags=["chat"])
 
-def get_llm_client() -> LLMClient:
-    return LLMClient()  
-
-def get_chat_service(llm_client: LLMClient = Depends(get_llm_client)) -> ChatService:
-    return ChatService(llm_client)
+def get_chat_service(llm_router: LLMRouter = Depends(get_llm_router)) -> ChatService:
+    return ChatService(llm_router)
 
 class ChatSQLInput(BaseModel):
     message: str
@@ -21,6 +24,23 @@ class ChatSQLInput(BaseModel):
 class ChatSQLOutput(BaseModel):
     sql: str
 
+class ChatQueryOutput(BaseModel):
+    sql: str
+    type: str
+    rows: list[dict[str, Any]] | None = None
+
+class ChatPlanResult(BaseModel):
+    label: str
+    sql: str
+    type: str
+    rows: list[dict[str, Any]] | None = None
+    error: str | None = None
+    estimated_cost: float | None = None
+    estimated_rows: int | None = None
+
+class ChatPlanOutput(BaseModel):
+    results: list[ChatPlanResult]
+
 @chat_router.post("/sql", response_model=ChatSQLOutput)
 async def natural_language_to_sql(
     payload: ChatSQLInput,
@@ -33,15 +53,89 @@ async def natural_language_to_sql(
             message=payload.message
         )
 
-        clean_sql = sql.replace("```sql", "").replace("```", "").strip()
-
-        return {"sql": clean_sql}
+        return {"sql": clean_sql(sql)}
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    except LLMTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to generate SQL: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@chat_router.post("/query", response_model=ChatQueryOutput)
+async def natural_language_query(
+    payload: ChatSQLInput,
+    current_user: User = Depends(get_current_user),
+    chat_service: ChatService = Depends(get_chat_service),
+    session: AsyncSession = Depends(get_session)
+):
+    try:
+        sql = await chat_service.generate_sql(
+            user_id=current_user.id,
+            message=payload.message
+        )
+
+        return await execute_sql(session, clean_sql(sql), current_user.id)
+
+    except QueryRejected as e:
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "message": str(e),
+                "estimated_cost": e.estimated_cost,
+                "estimated_rows": e.estimated_rows
+            }
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    except LLMTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to run query: {str(e)}"
+        )
+
+@chat_router.post("/plan", response_model=ChatPlanOutput)
+async def natural_language_plan(
+    payload: ChatSQLInput,
+    current_user: User = Depends(get_current_user),
+    chat_service: ChatService = Depends(get_chat_service)
+):
+    # Pergunta composta: uma chamada à LLM e os SELECTs rodando em paralelo, cada um na sua conexão
+    try:
+        plan = await chat_service.generate_plan(
+            user_id=current_user.id,
+            message=payload.message
+        )
+
+        return {"results": await execute_plan(plan, current_user.id)}
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    except LLMTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to run query plan: {str(e)}"
+        )
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import date, datetime
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from database.session import get_session
+from database.data_module import User
+from auth.security import get_current_user
+
+forecast_router = APIRouter(prefix="/forecast", tags=["Forecast"])
+
+
+class AccountForecast(BaseModel):
+    account_id: UUID
+    name: str
+    current_balance: Decimal
+    end_balance: Decimal
+    min_balance: Decimal
+    min_balance_date: date
+    first_negative_date: date | None
+
+
+class CashFlowForecast(BaseModel):
+    start_date: date
+    end_date: date
+    current_balance: Decimal
+    end_balance: Decimal
+    min_balance: Decimal
+    min_balance_date: date
+    first_negative_date: date | None
+    accounts: list[AccountForecast]
+    daily_balances: list[float] # Saldo somado das contas, um por dia a partir de start_date
+    skipped_schedules: int
+
+
+@forecast_router.get("/cash-flow", response_model=CashFlowForecast)
+async def cash_flow(
+    days: int = Query(90, ge=1, le=3650),
+    spending_trend_days: int | None = Query(None, ge=7, le=365),
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    # numpy só é importado no primeiro forecast, não no boot do worker
+    from services.forecast_service import get_cash_flow_forecast
+
+    today = datetime.now(ZoneInfo(current_user.timezone or "America/Sao_Paulo")).date()
+
+    return await get_cash_flow_forecast(
+        session,
+        user_id=current_user.id,
+        today=today,
+        days=days,
+        spending_trend_days=spending_trend_days
+    )
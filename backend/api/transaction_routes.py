@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import date
+from decimal import Decimal
+
+from database.session import get_session
+from database.data_module import User
+from auth.security import get_current_user
+from services.search_service import search_transactions
+
+transaction_router = APIRouter(prefix="/transactions", tags=["Transactions"])
+
+
+class TransactionSearchResult(BaseModel):
+    id: UUID
+    date: date
+    amount: Decimal
+    description: str | None
+    type: str
+    status: str | None
+    account_id: UUID | None
+    category_id: UUID | None
+    credit_card_id: UUID | None
+    rank: float
+
+
+@transaction_router.get("/search", response_model=list[TransactionSearchResult])
+async def search(
+    q: str = Query(..., min_length=2),
+    limit: int = Query(50, ge=1, le=200),
+    start_date: date | None = None,
+    end_date: date | None = None,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    return await search_transactions(
+        session,
+        user_id=current_user.id,
+        query=q,
+        limit=limit,
+        start_date=start_date,
+        end_date=end_date
+    )
@@ -3,7 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from pydantic import BaseModel
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, timezone
 
 from database.session import get_session
 from database.data_module import User
@@ -45,7 +45,7 @@ async def create_user(
     session: AsyncSession = Depends(get_session)
 ):
     result = await session.execute(
-        select(User).where(User.email == data.email)
+        select(User).where(User.email == data.email, User.status == "active")
     )
     if result.scalar_one_or_none():
         raise HTTPException(
@@ -73,7 +73,7 @@ async def get_user(
     session: AsyncSession = Depends(get_session)
 ):
     result = await session.execute(
-        select(User).where(User.id == user_id)
+        select(User).where(User.id == user_id, User.status == "active")
     )
     user = result.scalar_one_or_none()
 
@@ -93,7 +93,7 @@ async def update_user(
     session: AsyncSession = Depends(get_session)
 ):
     result = await session.execute(
-        select(User).where(User.id == user_id)
+        select(User).where(User.id == user_id, User.status == "active")
     )
     user = result.scalar_one_or_none()
 
@@ -120,13 +120,13 @@ async def update_user(
     return user
 
 
-@user_router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT) # Tem que atualizar essa função pra usar soft delete (mudar apenas o status)
+@user_router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(
     user_id: UUID,
     session: AsyncSession = Depends(get_session)
 ):
     result = await session.execute(
-        select(User).where(User.id == user_id)
+        select(User).where(User.id == user_id, User.status == "active")
     )
     user = result.scalar_one_or_none()
 
@@ -136,5 +136,10 @@ async def delete_user(
             detail="User not found"
         )
 
-    await session.delete(user)
+    # Soft delete: a partir daqui o login e o token do usuário deixam de valer.
+    # Os dados são apagados em lotes pelo purge em segundo plano (database/user_purge.py)
+    user.status = "deleted"
+    user.deleted_at = datetime.now(timezone.utc)
+    user.updated_at = user.deleted_at
+
     await session.commit()
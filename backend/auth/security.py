@@ -9,7 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from database.session import get_session
 from database.data_module import User
-from main import SECRET_KEY
+from config import get_settings
 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 1 dia por enquanto, depois da pra usar refresh token 
@@ -39,7 +39,7 @@ def create_access_token(
 
     return jwt.encode(
         to_encode,
-        SECRET_KEY,
+        get_settings().secret_key,
         algorithm=ALGORITHM
     )
 
@@ -56,7 +56,7 @@ async def get_current_user(
     )
 
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, get_settings().secret_key, algorithms=[ALGORITHM])
         user_id: str | None = payload.get("sub")
         if not user_id:
             raise credentials_exception
@@ -69,7 +69,7 @@ async def get_current_user(
         raise credentials_exception
 
     result = await session.execute(
-        select(User).where(User.id == user_uuid)
+        select(User).where(User.id == user_uuid, User.status == "active")
     )
     user = result.scalar_one_or_none()
 
@@ -0,0 +1,66 @@
+"""
+Mede quanto tempo um worker novo leva pra importar o app (antes do lifespan).
+
+Uso (dentro de backend/):
+    python -m benchmarks.import_time [--runs 5] [--top 15]
+
+Cada execução roda `python -X importtime -c "import main"` num processo novo,
+então nenhum cache de módulo do processo atual interfere.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_once() -> tuple[float, list[tuple[int, str]]]:
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    if completed.returncode != 0:
+        raise SystemExit(completed.stderr)
+
+    modules = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        modules.append((int(cumulative.strip()), name.strip()))
+
+    return wall_ms, modules
+
+
+def main(runs: int, top: int):
+    wall_times = []
+    modules = []
+    for _ in range(runs):
+        wall_ms, modules = run_once()
+        wall_times.append(wall_ms)
+
+    print(f"import main (process wall time, {runs} runs)")
+    print(f"  median: {statistics.median(wall_times):.0f} ms")
+    print(f"  min:    {min(wall_times):.0f} ms")
+    print(f"  max:    {max(wall_times):.0f} ms\n")
+
+    print("slowest imports of the last run (cumulative):")
+    for cumulative_us, name in sorted(modules, reverse=True)[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    main(args.runs, args.top)
@@ -0,0 +1,93 @@
+"""
+Confere se as consultas com filtro de data do SYSTEM_PROMPT_SQL_AGENT leem só as
+partições mensais necessárias de transactions.
+
+Uso (dentro de backend/, com DATABASE_URL apontando pro banco já particionado):
+    python -m benchmarks.partition_pruning <user_id> [--analyze]
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+
+from sqlalchemy.sql import text
+
+from database.session import get_sessionmaker
+from services.prompts import prompt_examples
+
+PARTITION_RE = re.compile(r"^transactions_(\d{4}_\d{2}|default)$")
+
+
+def date_filtered_examples() -> list[tuple[str, str]]:
+    return [
+        (question, sql)
+        for question, sql in prompt_examples()
+        if re.search(r"\b(from|join|update)\s+transactions\b", sql, re.I)
+        and re.search(r"\bdate\s*(>=|<=|=|<|>|between)", sql, re.I)
+    ]
+
+
+def scanned_partitions(plan: dict) -> tuple[set[str], int]:
+    relations = set()
+    removed = 0
+
+    def walk(node: dict):
+        nonlocal removed
+        name = node.get("Relation Name", "")
+        if PARTITION_RE.match(name):
+            relations.add(name)
+        removed += node.get("Subplans Removed", 0)
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan)
+    return relations, removed
+
+
+async def main(user_id: str, analyze: bool):
+    async with get_sessionmaker()() as session:
+        result = await session.execute(text("""
+            SELECT COUNT(*)
+            FROM pg_inherits
+            WHERE inhparent = 'transactions'::regclass
+        """))
+        total = result.scalar_one()
+        print(f"transactions partitions: {total}\n")
+
+        failures = 0
+        for question, sql in date_filtered_examples():
+            sql = sql.replace("{user_id}", user_id).rstrip(";")
+            is_select = sql.lstrip().lower().startswith("select")
+            options = "ANALYZE, FORMAT JSON" if analyze and is_select else "FORMAT JSON"
+
+            started = time.perf_counter()
+            result = await session.execute(text(f"EXPLAIN ({options}) {sql}"))
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            plan = result.scalar_one()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+
+            relations, removed = scanned_partitions(plan[0]["Plan"])
+            # Partições podadas na inicialização do executor já não aparecem no plano
+            read = len(relations)
+            pruned = read < total
+            failures += not pruned
+
+            print(f"- {question}")
+            print(f"  partitions read: {read}/{total} (removed at executor startup: {removed})")
+            print(f"  pruning: {'ok' if pruned else 'NOT PRUNED'} ({elapsed_ms:.1f} ms)\n")
+
+        await session.rollback()
+
+    if failures:
+        raise SystemExit(f"{failures} query shape(s) read every partition")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("user_id")
+    parser.add_argument("--analyze", action="store_true", help="usa EXPLAIN ANALYZE nos SELECTs")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.user_id, args.analyze))
@@ -0,0 +1,76 @@
+from functools import lru_cache
+from typing import Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    # Lido do ambiente e do .env na primeira chamada de get_settings(), nunca no import
+    model_config = SettingsConfigDict(env_file=".env", env_ignore_empty=True, extra="ignore")
+
+    database_url: str
+    secret_key: str
+    google_api_key: Optional[str] = None
+    frontend_url: Optional[str] = None
+
+    sql_echo: bool = False
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+
+    # Warm-up no lifespan, antes do /health/ready responder ok
+    warmup_on_startup: bool = True
+    warmup_connections: int = 5
+
+    transactions_partition_months_ahead: int = 3
+    transactions_retention_months: Optional[int] = None
+    partition_maintenance_interval_seconds: int = 6 * 60 * 60
+
+    # Purge em segundo plano dos usuários excluídos (soft delete), em lotes com pausa entre eles
+    user_purge_batch_size: int = 500
+    user_purge_pause_seconds: float = 0.2
+    user_purge_lock_timeout_ms: int = 200
+    user_purge_interval_seconds: int = 60
+
+    # Providers de LLM, em ordem de preferência: gemini, openai (qualquer API compatível), stub (offline)
+    llm_providers: str = "gemini"
+    gemini_model: str = "gemini-2.5-flash-lite"
+    gemini_fast_model: Optional[str] = None
+    openai_base_url: Optional[str] = None
+    openai_api_key: Optional[str] = None
+    openai_model: str = "gpt-4o-mini"
+    openai_fast_model: Optional[str] = None
+
+    llm_router_short_message_chars: int = 120
+    llm_router_error_penalty: float = 4
+    llm_router_explore_rate: float = 0.05
+    llm_router_prior_latency_seconds: float = 1
+
+    # LLMClient: deadline por chamada, hedge, retries e circuit breaker
+    llm_timeout_seconds: float = 20
+    llm_hedge_enabled: bool = True
+    llm_hedge_percentile: float = 95
+    llm_hedge_initial_delay_seconds: float = 3
+    llm_hedge_min_delay_seconds: float = 0.3
+    llm_latency_window: int = 200
+    llm_latency_min_samples: int = 20
+    llm_max_retries: int = 2
+    llm_backoff_base_seconds: float = 0.25
+    llm_backoff_max_seconds: float = 2
+    llm_breaker_failure_threshold: int = 5
+    llm_breaker_reset_seconds: float = 30
+
+    sql_max_plan_cost: float = 200000
+    sql_max_plan_rows: int = 5000
+    sql_auto_limit_rows: int = 500
+    sql_statement_timeout_ms: int = 5000
+    sql_verdict_cache_size: int = 1024
+    # Role com RLS (docs/model.sql) em que o SQL gerado pela LLM roda
+    sql_query_role: str = "contaai_llm"
+
+    # Modo plano do chat (/chat/plan): máximo de SELECTs independentes por pergunta
+    chat_plan_max_statements: int = 4
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
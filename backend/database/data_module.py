@@ -1,8 +1,8 @@
 import uuid
-from sqlalchemy import ( Column, Text, String, Boolean, Date, Integer, Numeric, ForeignKey, CheckConstraint, UniqueConstraint)
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import ( Column, Text, String, Boolean, Date, Integer, Numeric, ForeignKey, ForeignKeyConstraint, CheckConstraint, UniqueConstraint, Index, Computed)
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
 from sqlalchemy.orm import relationship, declarative_base
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from sqlalchemy.types import TIMESTAMP
 
 Base = declarative_base()
@@ -12,15 +12,35 @@ class User(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(Text, nullable=False)
-    email = Column(Text, nullable=False, unique=True)
+    email = Column(Text, nullable=False)
     password_hash = Column(Text, nullable=False)
     timezone = Column(Text, default="America/Sao_Paulo")
+    status = Column(Text, nullable=False, default="active", server_default="active") # 'deleted' = aguardando o purge
+    deleted_at = Column(TIMESTAMP(timezone=True))
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
     updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
     accounts = relationship("Account", back_populates="user")
     categories = relationship("Category", back_populates="user")
     tags = relationship("Tag", back_populates="user")
 
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('active', 'deleted')",
+            name="chk_user_status"
+        ),
+        Index(
+            "uq_users_email_active",
+            "email",
+            unique=True,
+            postgresql_where=text("status = 'active'")
+        ),
+        Index(
+            "idx_users_deleted",
+            "deleted_at",
+            postgresql_where=text("status = 'deleted'")
+        ),
+    )
+
 class AccountType(Base):
     __tablename__ = "account_types"
 
@@ -66,6 +86,28 @@ class Category(Base):
         ),
     )
 
+class CategoryClosure(Base):
+    # Um registro por par (ancestral, descendente), inclusive a própria categoria com depth 0.
+    # Mantida por trigger no banco (ver docs/model.sql)
+    __tablename__ = "category_closure"
+
+    ancestor_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("categories.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    descendant_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("categories.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    depth = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("idx_category_closure_descendant", "descendant_id", "depth"),
+    )
+
 class Tag(Base):
     __tablename__ = "tags"
 
@@ -132,13 +174,21 @@ class Transaction(Base):
     category_id = Column(UUID(as_uuid=True), ForeignKey("categories.id"))
     credit_card_id = Column(UUID(as_uuid=True), ForeignKey("credit_cards.id"))
     statement_id = Column(UUID(as_uuid=True), ForeignKey("credit_card_statements.id"))
-    date = Column(Date, nullable=False)
+    date = Column(Date, primary_key=True) # Chave de partição, precisa fazer parte da PK
     amount = Column(Numeric(18, 2), nullable=False)
     description = Column(Text)
     type = Column(Text, nullable=False)
     status = Column(Text, default="pending")
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
     updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    search_vector = Column(
+        TSVECTOR,
+        Computed(
+            "to_tsvector('portuguese', COALESCE(description, '')) || "
+            "to_tsvector('english', COALESCE(description, ''))",
+            persisted=True
+        )
+    )
 
     __table_args__ = (
         CheckConstraint(
@@ -149,22 +199,40 @@ class Transaction(Base):
             "status IN ('pending', 'posted', 'reconciled')",
             name="chk_transaction_status"
         ),
+        Index("idx_transactions_user_date", "user_id", "date"),
+        Index("idx_transactions_user_category_date", "user_id", "category_id", "date"),
+        Index("idx_transactions_search_vector", "user_id", "search_vector", postgresql_using="gin"),
+        Index(
+            "idx_transactions_description_trgm",
+            "user_id",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"}
+        ),
+        {"postgresql_partition_by": "RANGE (date)"},
     )
 
 class TransactionTag(Base):
     __tablename__ = "transaction_tags"
 
-    transaction_id = Column(
-        UUID(as_uuid=True),
-        ForeignKey("transactions.id", ondelete="CASCADE"),
-        primary_key=True
-    )
+    transaction_id = Column(UUID(as_uuid=True), primary_key=True)
+    transaction_date = Column(Date, nullable=False) # Preenchida por trigger se vier vazia
     tag_id = Column(
         UUID(as_uuid=True),
         ForeignKey("tags.id", ondelete="CASCADE"),
         primary_key=True
     )
 
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["transaction_id", "transaction_date"],
+            ["transactions.id", "transactions.date"],
+            ondelete="CASCADE",
+            onupdate="CASCADE",
+            name="fk_transaction_tag_transaction"
+        ),
+    )
+
 class ScheduledTransaction(Base):
     __tablename__ = "scheduled_transactions"
 
@@ -194,3 +262,19 @@ class Budget(Base):
     total_amount = Column(Numeric(18, 2))
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
     updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    snapshot = relationship("BudgetSnapshot", back_populates="budget", uselist=False)
+
+class BudgetSnapshot(Base):
+    # Mantida por trigger no banco (ver docs/model.sql), a aplicação só lê
+    __tablename__ = "budget_snapshots"
+
+    budget_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("budgets.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    spent_amount = Column(Numeric(18, 2), nullable=False, default=0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+    refreshed_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    budget = relationship("Budget", back_populates="snapshot")
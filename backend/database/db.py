@@ -1,27 +1,26 @@
-import os
-from typing import Generator, Optional
+from functools import lru_cache
 
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import DeclarativeBase, sessionmaker, Session
+from sqlalchemy import create_engine, Engine
+from sqlalchemy.orm import sessionmaker
 
-load_dotenv()
+from config import get_settings
 
-DATABASE_URL: Optional[str] = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL não definido. Verifique seu .env")
 
-engine = create_engine(
-    DATABASE_URL,
-    echo=True,         
-    pool_pre_ping=True,
-    future=True,
-)
-
-SessionLocal = sessionmaker(
-    bind=engine,
-    autoflush=False,
-    expire_on_commit=False,  
-)
+@lru_cache
+def get_sync_engine() -> Engine:
+    settings = get_settings()
+    return create_engine(
+        settings.database_url,
+        echo=settings.sql_echo,
+        pool_pre_ping=True,
+        future=True,
+    )
 
 
+@lru_cache
+def get_sync_sessionmaker() -> sessionmaker:
+    return sessionmaker(
+        bind=get_sync_engine(),
+        autoflush=False,
+        expire_on_commit=False,
+    )
@@ -0,0 +1,68 @@
+import asyncio
+import logging
+from datetime import date
+
+from sqlalchemy.sql import text
+
+from config import get_settings
+from database.session import get_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+
+def _months_before(today: date, months: int) -> date:
+    month_index = today.year * 12 + today.month - 1 - months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+async def ensure_transaction_partitions(months_ahead: int) -> int:
+    # +1 porque o mês atual também conta
+    async with get_sessionmaker()() as session:
+        result = await session.execute(
+            text("SELECT create_transaction_partitions(CURRENT_DATE, :months)"),
+            {"months": months_ahead + 1}
+        )
+        created = result.scalar_one()
+        await session.commit()
+
+    return created
+
+
+async def detach_old_transaction_partitions(retention_months: int) -> int:
+    before = _months_before(date.today().replace(day=1), retention_months)
+
+    async with get_sessionmaker()() as session:
+        result = await session.execute(
+            text("SELECT detach_transaction_partitions(:before)"),
+            {"before": before}
+        )
+        detached = result.scalar_one()
+        await session.commit()
+
+    return detached
+
+
+async def run_partition_maintenance():
+    settings = get_settings()
+
+    # Quantos meses à frente devem existir partições de transactions
+    created = await ensure_transaction_partitions(settings.transactions_partition_months_ahead)
+    if created:
+        logger.info("Created %s transactions partition(s)", created)
+
+    # Se definido, partições que terminaram há mais que isso são desanexadas (não apagadas)
+    if settings.transactions_retention_months is not None:
+        detached = await detach_old_transaction_partitions(settings.transactions_retention_months)
+        if detached:
+            logger.info("Detached %s transactions partition(s)", detached)
+
+
+async def partition_maintenance_loop():
+    # Todos os workers rodam isso, as funções no banco usam advisory lock e são idempotentes
+    while True:
+        try:
+            await run_partition_maintenance()
+        except Exception:
+            logger.exception("Transactions partition maintenance failed")
+
+        await asyncio.sleep(get_settings().partition_maintenance_interval_seconds)
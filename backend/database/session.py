@@ -1,29 +1,55 @@
-import os
-from typing import AsyncGenerator, Optional
+import asyncio
+from functools import lru_cache
+from typing import AsyncGenerator
 
-from dotenv import load_dotenv
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql import text
 
-load_dotenv()
+from config import get_settings
 
-DATABASE_URL: Optional[str] = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL não definido")
 
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True,
-    pool_pre_ping=True,
-)
+@lru_cache
+def get_engine() -> AsyncEngine:
+    # Criado no primeiro uso (ou no warm-up do lifespan), não no import
+    settings = get_settings()
+    return create_async_engine(
+        settings.database_url,
+        echo=settings.sql_echo,
+        pool_pre_ping=True,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+    )
 
-AsyncSessionLocal = sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    autoflush=False,
-    expire_on_commit=False,
-)
 
-async def get_session() -> AsyncGenerator[AsyncSession, None]: #Função async pra poder criar fila de mensagens, depois rever se isso é bom msm 
-    async with AsyncSessionLocal() as session:
+@lru_cache
+def get_sessionmaker() -> sessionmaker:
+    return sessionmaker(
+        bind=get_engine(),
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
+async def get_session() -> AsyncGenerator[AsyncSession, None]: #Função async pra poder criar fila de mensagens, depois rever se isso é bom msm
+    async with get_sessionmaker()() as session:
         yield session
+
+
+async def warm_up_pool(connections: int):
+    # Abre as conexões ao mesmo tempo pra que o pool fique com todas elas prontas
+    engine = get_engine()
+
+    async def _open():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(_open() for _ in range(connections)))
+
+
+async def dispose_engine():
+    if get_engine.cache_info().currsize:
+        await get_engine().dispose()
+        get_sessionmaker.cache_clear()
+        get_engine.cache_clear()
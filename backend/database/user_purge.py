@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import time
+from uuid import UUID
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.sql import text
+
+from config import get_settings
+from database.session import get_engine
+
+logger = logging.getLogger(__name__)
+
+LOCK_NOT_AVAILABLE = "55P03"
+
+# Ordem respeita as FKs de data_module.py: quem referencia sai antes de quem é referenciado.
+# budgets sai antes de transactions pra o trigger de budget_snapshots não ter o que recalcular;
+# budget_snapshots e category_closure saem por ON DELETE CASCADE junto com budgets e categories
+PURGE_STEPS = [
+    ("budgets", """
+        DELETE FROM budgets
+        WHERE id IN (
+            SELECT id FROM budgets WHERE user_id = :user_id LIMIT :batch_size
+        )
+    """),
+    ("transaction_tags", """
+        DELETE FROM transaction_tags
+        WHERE (transaction_id, tag_id) IN (
+            SELECT tt.transaction_id, tt.tag_id
+            FROM transaction_tags tt
+            JOIN tags t ON t.id = tt.tag_id
+            WHERE t.user_id = :user_id
+            LIMIT :batch_size
+        )
+    """),
+    ("transactions", """
+        DELETE FROM transactions
+        WHERE (id, date) IN (
+            SELECT id, date FROM transactions WHERE user_id = :user_id LIMIT :batch_size
+        )
+    """),
+    ("scheduled_transactions", """
+        DELETE FROM scheduled_transactions
+        WHERE id IN (
+            SELECT id FROM scheduled_transactions WHERE user_id = :user_id LIMIT :batch_size
+        )
+    """),
+    ("credit_card_statements", """
+        DELETE FROM credit_card_statements
+        WHERE id IN (
+            SELECT id FROM credit_card_statements WHERE user_id = :user_id LIMIT :batch_size
+        )
+    """),
+    ("credit_cards", """
+        DELETE FROM credit_cards
+        WHERE id IN (
+            SELECT id FROM credit_cards WHERE user_id = :user_id LIMIT :batch_size
+        )
+    """),
+    ("accounts", """
+        DELETE FROM accounts
+        WHERE id IN (
+            SELECT id FROM accounts WHERE user_id = :user_id LIMIT :batch_size
+        )
+    """),
+    # parent_category_id aponta pra própria tabela: apaga das folhas pra raiz
+    ("categories", """
+        DELETE FROM categories
+        WHERE id IN (
+            SELECT c.id
+            FROM categories c
+            WHERE c.user_id = :user_id
+              AND NOT EXISTS (
+                SELECT 1 FROM categories child WHERE child.parent_category_id = c.id
+              )
+            LIMIT :batch_size
+        )
+    """),
+    ("tags", """
+        DELETE FROM tags
+        WHERE id IN (
+            SELECT id FROM tags WHERE user_id = :user_id LIMIT :batch_size
+        )
+    """),
+]
+
+# Passos que só enxergam parte das linhas a cada lote (categories: só as folhas da vez).
+# Um lote curto não quer dizer que acabou, então repetem até um lote não apagar nada
+DRAIN_UNTIL_EMPTY = {"categories"}
+
+
+def _is_lock_timeout(error: DBAPIError) -> bool:
+    code = getattr(error.orig, "pgcode", None) or getattr(error.orig, "sqlstate", None)
+    return code == LOCK_NOT_AVAILABLE
+
+
+async def _delete_batch(conn: AsyncConnection, sql: str, user_id: UUID) -> int:
+    settings = get_settings()
+
+    async with conn.begin():
+        # Se uma linha do lote estiver travada por um request, o lote desiste em vez de esperar
+        await conn.execute(
+            text("SELECT set_config('lock_timeout', :timeout, true)"),
+            {"timeout": f"{settings.user_purge_lock_timeout_ms}ms"}
+        )
+        result = await conn.execute(
+            text(sql),
+            {"user_id": user_id, "batch_size": settings.user_purge_batch_size}
+        )
+
+    return result.rowcount
+
+
+async def purge_user(conn: AsyncConnection, user_id: UUID) -> int:
+    settings = get_settings()
+    deleted = 0
+
+    for table, sql in PURGE_STEPS:
+        while True:
+            started = time.perf_counter()
+            count = await _delete_batch(conn, sql, user_id)
+            deleted += count
+
+            if count:
+                logger.debug("Purged %s row(s) from %s for user %s", count, table, user_id)
+                # Pausa pelo menos o tempo que o lote levou: o purge nunca ocupa
+                # mais que metade do tempo de uma conexão
+                await asyncio.sleep(max(settings.user_purge_pause_seconds, time.perf_counter() - started))
+
+            if count == 0 or (count < settings.user_purge_batch_size and table not in DRAIN_UNTIL_EMPTY):
+                break
+
+    async with conn.begin():
+        await conn.execute(
+            text("DELETE FROM users WHERE id = :user_id AND status = 'deleted'"),
+            {"user_id": user_id}
+        )
+
+    return deleted
+
+
+async def purge_deleted_users() -> int:
+    purged = 0
+
+    # Uma conexão só pra rodada inteira; o advisory lock garante um purge por vez entre os workers
+    async with get_engine().connect() as conn:
+        result = await conn.execute(text("SELECT pg_try_advisory_lock(hashtext('user_purge'))"))
+        locked = result.scalar_one()
+        await conn.commit()
+        if not locked:
+            return 0
+
+        try:
+            result = await conn.execute(text("""
+                SELECT id
+                FROM users
+                WHERE status = 'deleted'
+                ORDER BY deleted_at
+            """))
+            user_ids = result.scalars().all()
+            await conn.commit()
+
+            for user_id in user_ids:
+                try:
+                    deleted = await purge_user(conn, user_id)
+                except DBAPIError as e:
+                    if not _is_lock_timeout(e):
+                        raise
+                    # Tenta de novo na próxima rodada, do ponto onde parou
+                    logger.warning("User %s purge hit a lock, retrying next round", user_id)
+                    continue
+
+                purged += 1
+                logger.info("Purged user %s (%s dependent row(s))", user_id, deleted)
+
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(hashtext('user_purge'))"))
+            await conn.commit()
+
+    return purged
+
+
+async def user_purge_loop():
+    while True:
+        try:
+            await purge_deleted_users()
+        except Exception:
+            logger.exception("Deleted users purge failed")
+
+        await asyncio.sleep(get_settings().user_purge_interval_seconds)
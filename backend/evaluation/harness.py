@@ -0,0 +1,303 @@
+"""
+Avalia a geração de SQL (ChatService) contra o corpus.json num banco com o seed.sql aplicado.
+As respostas do LLM ficam gravadas num cassette, então o replay roda sem rede e sempre
+com as mesmas respostas. Com --prompt-b os dois prompts aparecem lado a lado.
+
+O cassettes/recordings.json versionado cobre o corpus.json com o prompt padrão, gravado pelo
+StubProvider com respostas de referência: tokens estimados e latência ~0. Pra medir tokens e
+latência reais, grave de novo com --mode record apontando pro provider de verdade.
+
+Uso (dentro de backend/, com DATABASE_URL apontando pro banco de avaliação):
+    python -m evaluation.harness --seed --mode auto
+    python -m evaluation.harness --prompt-b /tmp/novo_prompt.txt --mode auto
+    python -m evaluation.harness --prompt-b /tmp/novo_prompt.txt          # replay, sem rede
+
+--prompt-a/--prompt-b aceitam "modulo:ATRIBUTO" ou o caminho de um arquivo texto.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import math
+import os
+import time
+from collections import Counter
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+
+from sqlalchemy.sql import text
+
+from config import get_settings
+from database.session import get_engine, get_sessionmaker
+from evaluation.recording import MissingRecording, RecordingLLM
+from services.chat_service import ChatService, clean_sql
+from services.sql_guard import guard_sql, set_statement_timeout
+
+EVAL_USER_ID = UUID("11111111-1111-1111-1111-111111111111")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CORPUS = os.path.join(HERE, "corpus.json")
+DEFAULT_CASSETTE = os.path.join(HERE, "cassettes", "recordings.json")
+SEED_PATH = os.path.join(HERE, "seed.sql")
+DEFAULT_PROMPT = "services.prompts:SYSTEM_PROMPT_SQL_AGENT"
+
+
+def load_prompt(spec: str) -> str:
+    if os.path.exists(spec):
+        with open(spec, encoding="utf-8") as f:
+            return f.read()
+
+    module_name, _, attr = spec.partition(":")
+    if not attr:
+        raise SystemExit(f"Prompt {spec!r} is neither a file nor module:ATTR")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def normalize(value):
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return str(value).lower()
+    if isinstance(value, (int, float, Decimal)):
+        value = Decimal(str(value))
+        return str(int(value)) if value == value.to_integral_value() else f"{value:.2f}"
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def _match_columns(expected: list[tuple], actual: list[tuple], width: int) -> list[int] | None:
+    # A ordem e os nomes das colunas ficam livres: cada coluna esperada precisa casar com uma
+    # coluna distinta do resultado que tenha os mesmos valores, e as linhas projetadas têm que bater
+    expected_columns = [Counter(row[i] for row in expected) for i in range(len(expected[0]))]
+    actual_columns = [Counter(row[j] for row in actual) for j in range(width)]
+    expected_rows = Counter(expected)
+
+    def search(i: int, chosen: list[int]) -> list[int] | None:
+        if i == len(expected_columns):
+            projected = Counter(tuple(row[j] for j in chosen) for row in actual)
+            return chosen if projected == expected_rows else None
+        for j in range(width):
+            if j not in chosen and actual_columns[j] == expected_columns[i]:
+                found = search(i + 1, chosen + [j])
+                if found is not None:
+                    return found
+        return None
+
+    return search(0, [])
+
+
+def compare(expected: dict, outcome: dict) -> bool:
+    if expected.get("rejected"):
+        return outcome["rejected"]
+    if outcome["rejected"] or outcome["error"]:
+        return False
+
+    if "affected_rows" in expected:
+        return outcome.get("affected_rows") == expected["affected_rows"]
+
+    rows = outcome.get("rows")
+    if rows is None:
+        return False
+
+    expected_rows = [tuple(normalize(value) for value in row) for row in expected["rows"]]
+    actual_rows = [tuple(normalize(value) for value in row) for row in rows]
+
+    if len(expected_rows) != len(actual_rows):
+        return False
+    if not expected_rows:
+        return True
+
+    width = len(actual_rows[0])
+    if width < len(expected_rows[0]):
+        return False
+
+    return _match_columns(expected_rows, actual_rows, width) is not None
+
+
+async def run_case(chat_service: ChatService, recorder: RecordingLLM, case: dict) -> dict:
+    outcome = {
+        "id": case["id"],
+        "sql": None,
+        "rejected": False,
+        "error": None,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "llm_ms": 0.0,
+        "db_ms": 0.0,
+    }
+    started = time.perf_counter()
+    llm_elapsed = 0.0
+
+    async with get_sessionmaker()() as session:
+        try:
+            recorder.last_call = None
+            llm_started = time.perf_counter()
+            try:
+                sql = await chat_service.generate_sql(EVAL_USER_ID, case["question"])
+            finally:
+                llm_elapsed = time.perf_counter() - llm_started
+                if recorder.last_call:
+                    outcome["prompt_tokens"] = recorder.last_call["prompt_tokens"]
+                    outcome["completion_tokens"] = recorder.last_call["completion_tokens"]
+                    outcome["llm_ms"] = recorder.last_call["latency_ms"]
+
+            sql = clean_sql(sql)
+            outcome["sql"] = sql
+
+            db_started = time.perf_counter()
+            await set_statement_timeout(session, get_settings().sql_statement_timeout_ms)
+            sql = await guard_sql(session, sql)
+            result = await session.execute(text(sql))
+
+            if sql.strip().lower().startswith(("select", "with")):
+                outcome["rows"] = [tuple(row) for row in result.all()]
+            else:
+                outcome["affected_rows"] = result.rowcount
+            outcome["db_ms"] = round((time.perf_counter() - db_started) * 1000, 1)
+
+        except MissingRecording:
+            raise
+
+        except ValueError as e:
+            # validate_sql e o guard de custo (QueryRejected) recusam com ValueError
+            outcome["rejected"] = True
+            outcome["error"] = str(e)
+
+        except Exception as e:
+            outcome["error"] = f"{type(e).__name__}: {e}"
+
+        finally:
+            # Nada que o LLM gerou fica no banco, o seed vale pra todas as rodadas
+            await session.rollback()
+
+    # No replay a latência do LLM é a gravada; o resto (validação, banco) é medido agora
+    overhead = time.perf_counter() - started - llm_elapsed
+    outcome["total_ms"] = round(outcome["llm_ms"] + overhead * 1000, 1)
+    outcome["ok"] = compare(case["expected"], outcome)
+    outcome.pop("rows", None)
+    return outcome
+
+
+async def run_prompt(prompt: str, recorder: RecordingLLM, corpus: list[dict]) -> list[dict]:
+    chat_service = ChatService(recorder, system_prompt=prompt)
+    return [await run_case(chat_service, recorder, case) for case in corpus]
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def summarize(outcomes: list[dict]) -> dict:
+    total = len(outcomes) or 1
+    latencies = [outcome["total_ms"] for outcome in outcomes]
+    return {
+        "accuracy": sum(outcome["ok"] for outcome in outcomes) / total,
+        "rejection_rate": sum(outcome["rejected"] for outcome in outcomes) / total,
+        "prompt_tokens": sum(outcome["prompt_tokens"] for outcome in outcomes),
+        "completion_tokens": sum(outcome["completion_tokens"] for outcome in outcomes),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+    }
+
+
+def print_report(reports: dict[str, list[dict]]):
+    labels = list(reports)
+    by_case = {label: {outcome["id"]: outcome for outcome in outcomes} for label, outcomes in reports.items()}
+    case_ids = [outcome["id"] for outcome in reports[labels[0]]]
+
+    def cell(outcome: dict) -> str:
+        status = "ok" if outcome["ok"] else ("rejected" if outcome["rejected"] else "FAIL")
+        tokens = f"{outcome['prompt_tokens']}+{outcome['completion_tokens']}"
+        return f"{status:<8} {tokens:>10} {outcome['total_ms']:>8.0f} ms"
+
+    width = max(len(case_id) for case_id in case_ids)
+    print(f"{'case':<{width}}  " + "  ".join(f"{label:<30}" for label in labels))
+    for case_id in case_ids:
+        print(f"{case_id:<{width}}  " + "  ".join(f"{cell(by_case[label][case_id]):<30}" for label in labels))
+
+    print()
+    summaries = {label: summarize(outcomes) for label, outcomes in reports.items()}
+    rows = [
+        ("accuracy", lambda s: f"{s['accuracy']:.0%}"),
+        ("rejection rate", lambda s: f"{s['rejection_rate']:.0%}"),
+        ("prompt tokens", lambda s: str(s["prompt_tokens"])),
+        ("completion tokens", lambda s: str(s["completion_tokens"])),
+        ("latency p50", lambda s: f"{s['p50_ms']:.0f} ms"),
+        ("latency p95", lambda s: f"{s['p95_ms']:.0f} ms"),
+    ]
+    for name, fmt in rows:
+        print(f"{name:<{width}}  " + "  ".join(f"{fmt(summaries[label]):<30}" for label in labels))
+
+    for label, outcomes in reports.items():
+        for outcome in outcomes:
+            if not outcome["ok"]:
+                print(f"\n[{label}] {outcome['id']}: {outcome['error'] or 'unexpected result'}\n  {outcome['sql']}")
+
+
+async def apply_seed():
+    with open(SEED_PATH, encoding="utf-8") as f:
+        seed = f.read()
+
+    # Script com vários comandos: vai direto pro driver, sem prepared statement
+    async with get_engine().connect() as conn:
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.execute(seed)
+
+
+async def main(args):
+    with open(args.corpus, encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    if args.seed:
+        await apply_seed()
+
+    llm = None
+    if args.mode != "replay":
+        from services.llm_router import get_llm_router
+        llm = get_llm_router()
+
+    recorder = RecordingLLM(llm, args.cassette, args.mode)
+    prompts = {"A": load_prompt(args.prompt_a)}
+    if args.prompt_b:
+        prompts["B"] = load_prompt(args.prompt_b)
+
+    reports = {}
+    try:
+        for label, prompt in prompts.items():
+            reports[label] = await run_prompt(prompt, recorder, corpus)
+    except MissingRecording as e:
+        raise SystemExit(str(e))
+    finally:
+        if args.mode != "replay":
+            recorder.save()
+            from services.llm_router import close_llm_router
+            await close_llm_router()
+
+    print_report(reports)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {label: {"summary": summarize(outcomes), "cases": outcomes} for label, outcomes in reports.items()},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=("record", "replay", "auto"), default="replay")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--cassette", default=DEFAULT_CASSETTE)
+    parser.add_argument("--prompt-a", default=DEFAULT_PROMPT)
+    parser.add_argument("--prompt-b")
+    parser.add_argument("--seed", action="store_true", help="aplica evaluation/seed.sql antes de rodar")
+    parser.add_argument("--output", help="grava o relatório completo em JSON")
+
+    asyncio.run(main(parser.parse_args()))
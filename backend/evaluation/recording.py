@@ -0,0 +1,85 @@
+import hashlib
+import json
+import math
+import os
+import time
+
+
+def estimate_tokens(text: str) -> int:
+    # Só pra providers que não devolvem a contagem (stub): ~4 caracteres por token
+    return math.ceil(len(text) / 4)
+
+
+def recording_key(messages: list[dict]) -> str:
+    payload = json.dumps(messages, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MissingRecording(LookupError):
+    pass
+
+
+class RecordingLLM:
+    """
+    Envolve qualquer objeto com chat(messages) (LLMClient, LLMRouter) e grava/reproduz as respostas.
+
+    mode:
+        record - sempre chama o LLM e sobrescreve a gravação
+        replay - só usa gravações, sem rede (llm pode ser None)
+        auto   - usa a gravação se existir, senão chama o LLM e grava
+    """
+
+    def __init__(self, llm, cassette_path: str, mode: str = "replay"):
+        if mode not in ("record", "replay", "auto"):
+            raise ValueError(f"Unknown recording mode: {mode}")
+        if mode != "replay" and llm is None:
+            raise ValueError(f"Recording mode {mode} needs an LLM client")
+
+        self.llm = llm
+        self.cassette_path = cassette_path
+        self.mode = mode
+        self.cassette: dict[str, dict] = {}
+        self.last_call: dict | None = None
+
+        if os.path.exists(cassette_path):
+            with open(cassette_path, encoding="utf-8") as f:
+                self.cassette = json.load(f)
+
+    async def chat(self, messages: list[dict], timeout: float | None = None) -> str:
+        key = recording_key(messages)
+        entry = self.cassette.get(key)
+
+        if self.mode == "record" or (self.mode == "auto" and entry is None):
+            started = time.perf_counter()
+            response = await self.llm.chat(messages, timeout=timeout)
+            latency_ms = round((time.perf_counter() - started) * 1000, 1)
+
+            # Contagem real do provider (Completion); a estimativa só entra se ele não informou
+            prompt_tokens = getattr(response, "prompt_tokens", None)
+            if prompt_tokens is None:
+                prompt_tokens = estimate_tokens("".join(message["content"] for message in messages))
+            completion_tokens = getattr(response, "completion_tokens", None)
+            if completion_tokens is None:
+                completion_tokens = estimate_tokens(response)
+
+            entry = {
+                "question": messages[-1]["content"],
+                "response": str(response),
+                "latency_ms": latency_ms,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+            }
+            self.cassette[key] = entry
+
+        elif entry is None:
+            raise MissingRecording(
+                f"No recording for: {messages[-1]['content']!r}. Run the harness with --mode record or auto."
+            )
+
+        self.last_call = entry
+        return entry["response"]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.cassette_path) or ".", exist_ok=True)
+        with open(self.cassette_path, "w", encoding="utf-8") as f:
+            json.dump(self.cassette, f, ensure_ascii=False, indent=2, sort_keys=True)
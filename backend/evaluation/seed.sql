@@ -0,0 +1,81 @@
+-- Dados fixos do usuário de avaliação (docs/model.sql precisa estar aplicado).
+-- As datas são relativas ao mês atual pra o gabarito do corpus.json valer em qualquer dia:
+--   "este mês"     -> date_trunc('month', CURRENT_DATE) e CURRENT_DATE
+--   "mês passado"  -> date_trunc('month', CURRENT_DATE) - 10 dias
+
+BEGIN;
+
+DELETE FROM transactions WHERE user_id = '11111111-1111-1111-1111-111111111111';
+DELETE FROM budgets WHERE user_id = '11111111-1111-1111-1111-111111111111';
+DELETE FROM scheduled_transactions WHERE user_id = '11111111-1111-1111-1111-111111111111';
+DELETE FROM credit_card_statements WHERE user_id = '11111111-1111-1111-1111-111111111111';
+DELETE FROM credit_cards WHERE user_id = '11111111-1111-1111-1111-111111111111';
+DELETE FROM categories WHERE user_id = '11111111-1111-1111-1111-111111111111';
+DELETE FROM tags WHERE user_id = '11111111-1111-1111-1111-111111111111';
+DELETE FROM accounts WHERE user_id = '11111111-1111-1111-1111-111111111111';
+DELETE FROM users WHERE id = '11111111-1111-1111-1111-111111111111';
+
+INSERT INTO users (id, name, email, password_hash)
+VALUES ('11111111-1111-1111-1111-111111111111', 'Eval User', 'eval@contaai.local', 'not-a-real-hash');
+
+INSERT INTO account_types (key, name)
+VALUES ('checking', 'Conta corrente')
+ON CONFLICT (key) DO NOTHING;
+
+INSERT INTO accounts (id, user_id, account_type_id, name, institution, initial_balance)
+SELECT '22222222-2222-2222-2222-222222222222', '11111111-1111-1111-1111-111111111111', id, 'Conta Corrente', 'Banco Eval', 1000.00
+FROM account_types
+WHERE key = 'checking';
+
+INSERT INTO categories (id, user_id, parent_category_id, name, type) VALUES
+  ('33333333-0000-0000-0000-000000000001', '11111111-1111-1111-1111-111111111111', NULL, 'Food', 'expense'),
+  ('33333333-0000-0000-0000-000000000002', '11111111-1111-1111-1111-111111111111', '33333333-0000-0000-0000-000000000001', 'Groceries', 'expense'),
+  ('33333333-0000-0000-0000-000000000003', '11111111-1111-1111-1111-111111111111', '33333333-0000-0000-0000-000000000001', 'Restaurants', 'expense'),
+  ('33333333-0000-0000-0000-000000000004', '11111111-1111-1111-1111-111111111111', NULL, 'Transport', 'expense'),
+  ('33333333-0000-0000-0000-000000000005', '11111111-1111-1111-1111-111111111111', NULL, 'Salary', 'income');
+
+INSERT INTO credit_cards (id, user_id, billing_account_id, issuer, name, last4, credit_limit, closing_day, due_day)
+VALUES ('44444444-4444-4444-4444-444444444444', '11111111-1111-1111-1111-111111111111', '22222222-2222-2222-2222-222222222222', 'Eval Bank', 'Eval Card', '1234', 5000.00, 1, 10);
+
+INSERT INTO credit_card_statements (id, credit_card_id, user_id, period_start, period_end, closing_date, due_date, total_amount, paid_amount, status)
+VALUES (
+  '55555555-5555-5555-5555-555555555555',
+  '44444444-4444-4444-4444-444444444444',
+  '11111111-1111-1111-1111-111111111111',
+  date_trunc('month', CURRENT_DATE)::date,
+  (date_trunc('month', CURRENT_DATE) + INTERVAL '1 month - 1 day')::date,
+  (date_trunc('month', CURRENT_DATE) + INTERVAL '1 month')::date,
+  (date_trunc('month', CURRENT_DATE) + INTERVAL '1 month 9 days')::date,
+  600.00,
+  0,
+  'open'
+);
+
+INSERT INTO transactions (user_id, account_id, category_id, credit_card_id, statement_id, date, amount, description, type, status) VALUES
+  ('11111111-1111-1111-1111-111111111111', '22222222-2222-2222-2222-222222222222', '33333333-0000-0000-0000-000000000005', NULL, NULL,
+   date_trunc('month', CURRENT_DATE)::date, 5000.00, 'Salary', 'income', 'posted'),
+  ('11111111-1111-1111-1111-111111111111', '22222222-2222-2222-2222-222222222222', '33333333-0000-0000-0000-000000000002', NULL, NULL,
+   date_trunc('month', CURRENT_DATE)::date, -320.50, 'Supermercado Extra', 'expense', 'posted'),
+  ('11111111-1111-1111-1111-111111111111', '22222222-2222-2222-2222-222222222222', '33333333-0000-0000-0000-000000000003', NULL, NULL,
+   date_trunc('month', CURRENT_DATE)::date, -85.00, 'Restaurante Sabor', 'expense', 'posted'),
+  ('11111111-1111-1111-1111-111111111111', '22222222-2222-2222-2222-222222222222', '33333333-0000-0000-0000-000000000004', NULL, NULL,
+   CURRENT_DATE, -42.30, 'Uber trip', 'expense', 'pending'),
+  ('11111111-1111-1111-1111-111111111111', '22222222-2222-2222-2222-222222222222', '33333333-0000-0000-0000-000000000002', NULL, NULL,
+   CURRENT_DATE, -150.00, 'Grocery store', 'expense', 'pending'),
+  ('11111111-1111-1111-1111-111111111111', NULL, NULL, '44444444-4444-4444-4444-444444444444', '55555555-5555-5555-5555-555555555555',
+   date_trunc('month', CURRENT_DATE)::date, -600.00, 'Notebook', 'expense', 'posted'),
+  ('11111111-1111-1111-1111-111111111111', '22222222-2222-2222-2222-222222222222', '33333333-0000-0000-0000-000000000002', NULL, NULL,
+   (date_trunc('month', CURRENT_DATE) - INTERVAL '10 days')::date, -210.00, 'Supermercado Extra', 'expense', 'posted'),
+  ('11111111-1111-1111-1111-111111111111', '22222222-2222-2222-2222-222222222222', '33333333-0000-0000-0000-000000000005', NULL, NULL,
+   (date_trunc('month', CURRENT_DATE) - INTERVAL '10 days')::date, 5000.00, 'Salary', 'income', 'posted');
+
+INSERT INTO budgets (user_id, name, start_date, end_date, total_amount)
+VALUES (
+  '11111111-1111-1111-1111-111111111111',
+  'Monthly',
+  date_trunc('month', CURRENT_DATE)::date,
+  (date_trunc('month', CURRENT_DATE) + INTERVAL '1 month - 1 day')::date,
+  3000.00
+);
+
+COMMIT;
@@ -1,14 +1,49 @@
-from fastapi import FastAPI
-from dotenv import load_dotenv
+from fastapi import FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-import os
+from contextlib import asynccontextmanager, suppress
+import asyncio
 
-load_dotenv()
+from config import get_settings
+from database.partitions import partition_maintenance_loop
+from database.session import dispose_engine
+from database.user_purge import user_purge_loop
+from services.llm_router import close_llm_router
+from services.warmup import warm_up
+from api.auth_routes import auth_router
+from api.chat_routes import chat_router
+from api.user_routes import user_router
+from api.budget_routes import budget_router
+from api.category_routes import category_router
+from api.transaction_routes import transaction_router
+from api.forecast_routes import forecast_router
+
+
+# Nada de engine, client da LLM ou leitura de config no import: tudo é criado no
+# lifespan (warm-up) ou no primeiro uso, pra o worker subir rápido
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    settings = get_settings()
+
+    maintenance = asyncio.create_task(partition_maintenance_loop())
+    purge = asyncio.create_task(user_purge_loop())
+
+    if settings.warmup_on_startup:
+        await warm_up(settings)
+
+    app.state.ready = True
+    yield
 
-SECRET_KEY = os.getenv("SECRET_KEY")
-frontend_url = os.getenv("FRONTEND_URL")
+    app.state.ready = False
+    for task in (maintenance, purge):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await close_llm_router()
+    await dispose_engine()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,10 +54,23 @@ app.add_middleware(
 )
 
 
-from api.auth_routes import auth_router
-from api.chat_routes import chat_router
-from api.user_routes import user_router
+@app.get("/health/live", tags=["Health"])
+async def liveness():
+    return {"status": "ok"}
+
+
+@app.get("/health/ready", tags=["Health"])
+async def readiness(request: Request, response: Response):
+    if not getattr(request.app.state, "ready", False):
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "starting"}
+    return {"status": "ready"}
+
 
 app.include_router(auth_router)
 app.include_router(chat_router)
-app.include_router(user_router)
\ No newline at end of file
+app.include_router(user_router)
+app.include_router(budget_router)
+app.include_router(category_router)
+app.include_router(transaction_router)
+app.include_router(forecast_router)
\ No newline at end of file
@@ -0,0 +1,82 @@
+from datetime import date
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import text
+
+# O consumo vem de budget_snapshots, que é mantido por trigger a cada transação
+# dentro da janela do orçamento. Assim o dashboard não agrega transactions a cada poll.
+BUDGET_PROGRESS_SQL = text("""
+WITH active AS (
+    SELECT
+        b.id,
+        b.name,
+        b.start_date,
+        b.end_date,
+        b.total_amount,
+        s.budget_id IS NOT NULL AS has_snapshot,
+        COALESCE(s.spent_amount, 0) AS spent_amount,
+        COALESCE(s.transaction_count, 0) AS transaction_count,
+        s.refreshed_at,
+        CAST(:today AS date) - b.start_date + 1 AS elapsed_days,
+        b.end_date - b.start_date + 1 AS total_days
+    FROM budgets b
+    LEFT JOIN budget_snapshots s ON s.budget_id = b.id
+    WHERE b.user_id = :user_id
+      AND b.start_date <= CAST(:today AS date)
+      AND b.end_date >= CAST(:today AS date)
+)
+SELECT
+    id,
+    name,
+    start_date,
+    end_date,
+    total_amount,
+    has_snapshot,
+    spent_amount,
+    transaction_count,
+    refreshed_at,
+    elapsed_days,
+    total_days,
+    total_amount - spent_amount AS remaining_amount,
+    ROUND(spent_amount / elapsed_days, 2) AS daily_burn_rate,
+    ROUND(spent_amount / elapsed_days * total_days, 2) AS projected_amount,
+    CASE
+        WHEN total_amount IS NULL OR total_days = elapsed_days THEN NULL
+        ELSE ROUND((total_amount - spent_amount) / (total_days - elapsed_days), 2)
+    END AS daily_allowance
+FROM active
+ORDER BY end_date, name
+""")
+
+# Orçamentos criados antes do trigger existir ainda não têm snapshot
+REBUILD_MISSING_SNAPSHOTS_SQL = text("""
+SELECT rebuild_budget_snapshot(b.id)
+FROM budgets b
+WHERE b.user_id = :user_id
+  AND b.start_date <= CAST(:today AS date)
+  AND b.end_date >= CAST(:today AS date)
+  AND NOT EXISTS (
+      SELECT 1 FROM budget_snapshots s WHERE s.budget_id = b.id
+  )
+""")
+
+
+async def get_budget_progress(
+    session: AsyncSession,
+    user_id: UUID,
+    today: date
+) -> list[dict]:
+    params = {"user_id": user_id, "today": today}
+
+    result = await session.execute(BUDGET_PROGRESS_SQL, params)
+    rows = result.mappings().all()
+
+    if any(not row["has_snapshot"] for row in rows):
+        await session.execute(REBUILD_MISSING_SNAPSHOTS_SQL, params)
+        await session.commit()
+
+        result = await session.execute(BUDGET_PROGRESS_SQL, params)
+        rows = result.mappings().all()
+
+    return [dict(row) for row in rows]
@@ -0,0 +1,65 @@
+from datetime import date
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import text
+
+# Um único join indexado: category_closure (ancestor_id) -> transactions (user_id, category_id, date)
+ROLLUP_SQL = """
+SELECT
+    cc.descendant_id AS category_id,
+    c.name,
+    c.parent_category_id,
+    cc.depth,
+    COALESCE(SUM(t.amount), 0) AS total_amount,
+    COUNT(t.id) AS transaction_count
+FROM category_closure cc
+JOIN categories c ON c.id = cc.descendant_id
+LEFT JOIN transactions t
+    ON t.category_id = cc.descendant_id
+   AND t.user_id = :user_id
+   {date_filter}
+WHERE cc.ancestor_id = :category_id
+  AND cc.user_id = :user_id
+GROUP BY cc.descendant_id, c.name, c.parent_category_id, cc.depth
+ORDER BY cc.depth, c.name
+"""
+
+
+async def get_category_rollup(
+    session: AsyncSession,
+    user_id: UUID,
+    category_id: UUID,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> Optional[dict]:
+    params = {"user_id": user_id, "category_id": category_id}
+    date_filter = []
+
+    # Filtro direto em date pra aproveitar a poda de partições
+    if start_date is not None:
+        date_filter.append("AND t.date >= :start_date")
+        params["start_date"] = start_date
+    if end_date is not None:
+        date_filter.append("AND t.date <= :end_date")
+        params["end_date"] = end_date
+
+    result = await session.execute(
+        text(ROLLUP_SQL.format(date_filter="\n   ".join(date_filter))),
+        params
+    )
+    rows = [dict(row) for row in result.mappings().all()]
+
+    if not rows:
+        return None
+
+    return {
+        "category_id": category_id,
+        "name": rows[0]["name"],
+        "start_date": start_date,
+        "end_date": end_date,
+        "total_amount": sum(row["total_amount"] for row in rows),
+        "transaction_count": sum(row["transaction_count"] for row in rows),
+        "categories": rows
+    }
@@ -1,16 +1,28 @@
+import json
 from uuid import UUID
-from services.prompts import SYSTEM_PROMPT_SQL_AGENT
-from services.sql_validator import validate_sql
+from config import get_settings
+from services.prompts import SYSTEM_PROMPT_SQL_AGENT, SYSTEM_PROMPT_SQL_PLAN
+from services.sql_validator import validate_read_only_sql, validate_sql
+
+def clean_sql(sql: str) -> str:
+    return sql.replace("```sql", "").replace("```json", "").replace("```", "").strip()
 
 class ChatService:
-    def __init__(self, llm_client):
+    def __init__(
+        self,
+        llm_client,
+        system_prompt: str = SYSTEM_PROMPT_SQL_AGENT,
+        plan_prompt: str = SYSTEM_PROMPT_SQL_PLAN
+    ):
         self.llm = llm_client
+        self.system_prompt = system_prompt
+        self.plan_prompt = plan_prompt
 
-    def _build_prompt(self, user_id: UUID, message: str):
+    def _build_prompt(self, user_id: UUID, message: str, system_prompt: str | None = None):
         return [
             {
                 "role": "system",
-                "content": SYSTEM_PROMPT_SQL_AGENT
+                "content": system_prompt or self.system_prompt
             },
             {
                 "role": "user",
@@ -32,3 +44,39 @@ class ChatService:
 
         return sql
 
+    async def generate_plan(
+        self,
+        user_id: UUID,
+        message: str
+    ) -> list[dict]:
+        # Uma chamada à LLM pra uma pergunta composta: vários SELECTs independentes
+        messages = self._build_prompt(user_id, message, self.plan_prompt)
+
+        response = await self.llm.chat(messages)
+
+        try:
+            plan = json.loads(clean_sql(response))
+        except json.JSONDecodeError:
+            raise ValueError("The model did not return a valid query plan")
+
+        if not isinstance(plan, list) or not plan:
+            raise ValueError("The model did not return a valid query plan")
+
+        max_statements = get_settings().chat_plan_max_statements
+        if len(plan) > max_statements:
+            raise ValueError(f"Query plan has {len(plan)} statements (limit {max_statements})")
+
+        statements = []
+        for step in plan:
+            if not isinstance(step, dict) or not isinstance(step.get("sql"), str):
+                raise ValueError("The model did not return a valid query plan")
+
+            sql = clean_sql(step["sql"])
+            validate_read_only_sql(sql)
+
+            statements.append({
+                "label": str(step.get("label") or f"Query {len(statements) + 1}"),
+                "sql": sql
+            })
+
+        return statements
@@ -0,0 +1,297 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import text
+
+# Tudo que vem do banco já chega agregado por conta (e por dia, quando tem data), então a
+# memória da projeção é contas x dias do horizonte, não importa quantas transações o usuário tem.
+# Valores em centavos (int64) pra soma ser exata.
+
+ACCOUNT_BALANCES_SQL = text("""
+SELECT
+    a.id,
+    a.name,
+    a.initial_balance + COALESCE(SUM(t.amount), 0) AS balance
+FROM accounts a
+LEFT JOIN transactions t
+    ON t.account_id = a.id
+   AND t.user_id = :user_id
+   AND t.date <= CAST(:today AS date)
+WHERE a.user_id = :user_id
+  AND a.active
+GROUP BY a.id, a.name, a.initial_balance
+ORDER BY a.name
+""")
+
+# Transações já lançadas com data futura (agendadas à mão, parcelas, etc.)
+FUTURE_TRANSACTIONS_SQL = text("""
+SELECT account_id, date, SUM(amount) AS amount
+FROM transactions
+WHERE user_id = :user_id
+  AND account_id IS NOT NULL
+  AND date > CAST(:today AS date)
+  AND date <= CAST(:end_date AS date)
+GROUP BY account_id, date
+""")
+
+# Faturas em aberto saem da conta de pagamento do cartão no vencimento;
+# as já vencidas e não pagas ainda vão sair, então entram hoje (dia 0)
+STATEMENT_DUES_SQL = text("""
+SELECT
+    c.billing_account_id AS account_id,
+    GREATEST(s.due_date, CAST(:today AS date)) AS date,
+    -SUM(s.total_amount - s.paid_amount) AS amount
+FROM credit_card_statements s
+JOIN credit_cards c ON c.id = s.credit_card_id
+WHERE s.user_id = :user_id
+  AND s.status IN ('open', 'closed', 'partial')
+  AND s.due_date <= CAST(:end_date AS date)
+  AND c.billing_account_id IS NOT NULL
+GROUP BY c.billing_account_id, GREATEST(s.due_date, CAST(:today AS date))
+""")
+
+SCHEDULES_SQL = text("""
+SELECT account_id, amount, type, frequency, reference_day, next_execution, end_date
+FROM scheduled_transactions
+WHERE user_id = :user_id
+  AND active
+  AND next_execution <= CAST(:end_date AS date)
+  AND (end_date IS NULL OR end_date >= CAST(:today AS date))
+""")
+
+SPENDING_TREND_SQL = text("""
+SELECT account_id, SUM(amount) AS amount
+FROM transactions
+WHERE user_id = :user_id
+  AND account_id IS NOT NULL
+  AND type = 'expense'
+  AND date > CAST(:today AS date) - CAST(:trend_days AS int)
+  AND date <= CAST(:today AS date)
+GROUP BY account_id
+""")
+
+# frequency -> (unidade, passo)
+FREQUENCY_STEPS = {
+    "daily": ("day", 1),
+    "weekly": ("day", 7),
+    "biweekly": ("day", 14),
+    "monthly": ("month", 1),
+    "bimonthly": ("month", 2),
+    "quarterly": ("month", 3),
+    "semiannual": ("month", 6),
+    "yearly": ("month", 12),
+    "annual": ("month", 12),
+    "diaria": ("day", 1),
+    "semanal": ("day", 7),
+    "quinzenal": ("day", 14),
+    "mensal": ("month", 1),
+    "bimestral": ("month", 2),
+    "trimestral": ("month", 3),
+    "semestral": ("month", 6),
+    "anual": ("month", 12),
+}
+
+
+def _cents(value) -> int:
+    return int((Decimal(value) * 100).to_integral_value())
+
+
+def _money(cents) -> Decimal:
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def _strided_cumsum(impulses: np.ndarray, step: int) -> np.ndarray:
+    # Soma acumulada de step em step ao longo do eixo 1: um +valor no primeiro índice e um
+    # -valor logo depois do último viram o valor repetido em todas as ocorrências do meio
+    accounts, length = impulses.shape
+    return impulses.reshape(accounts, length // step, step).cumsum(axis=1).reshape(accounts, length)
+
+
+def _expand_day_steps(flows, account_idx, amounts, first, last, step):
+    horizon = flows.shape[1] - 1
+
+    # Avança as ocorrências que já passaram até a primeira de hoje em diante
+    first = np.where(first < 0, first + (-first + step - 1) // step * step, first)
+    last = np.minimum(last, horizon)
+    valid = first <= last
+    if not valid.any():
+        return
+
+    account_idx, amounts, first, last = account_idx[valid], amounts[valid], first[valid], last[valid]
+    stop = first + ((last - first) // step + 1) * step
+
+    length = -(-(horizon + 1 + step) // step) * step
+    impulses = np.zeros((flows.shape[0], length), dtype=np.int64)
+    np.add.at(impulses, (account_idx, first), amounts)
+    np.add.at(impulses, (account_idx, stop), -amounts)
+
+    flows += _strided_cumsum(impulses, step)[:, :horizon + 1]
+
+
+def _expand_month_steps(flows, today, account_idx, amounts, start_months, day, last, step):
+    horizon = flows.shape[1] - 1
+    today_d = np.datetime64(today, "D")
+    today_m = today_d.astype("datetime64[M]")
+
+    # Uma ocorrência por mês, no dia de referência (ou no último dia de meses mais curtos)
+    months = today_m + np.arange((today_d + horizon).astype("datetime64[M]") - today_m + 1)
+    month_days = months.astype("datetime64[D]")
+    days_in_month = ((months + 1).astype("datetime64[D]") - month_days).astype(np.int64)
+    occurrence = (month_days + np.minimum(day, days_in_month) - 1 - today_d).astype(np.int64)
+
+    first_month = np.searchsorted(occurrence, 0)
+    first = np.where(
+        start_months < first_month,
+        start_months + (first_month - start_months + step - 1) // step * step,
+        start_months
+    )
+    last = np.searchsorted(occurrence, np.minimum(last, horizon), side="right") - 1
+    valid = first <= last
+    if not valid.any():
+        return
+
+    account_idx, amounts, first, last = account_idx[valid], amounts[valid], first[valid], last[valid]
+    stop = first + ((last - first) // step + 1) * step
+
+    length = -(-(len(months) + step) // step) * step
+    impulses = np.zeros((flows.shape[0], length), dtype=np.int64)
+    np.add.at(impulses, (account_idx, first), amounts)
+    np.add.at(impulses, (account_idx, stop), -amounts)
+    by_month = _strided_cumsum(impulses, step)[:, :len(months)]
+
+    in_horizon = (occurrence >= 0) & (occurrence <= horizon)
+    flows[:, occurrence[in_horizon]] += by_month[:, in_horizon]
+
+
+def _add_schedules(flows, today: date, account_index: dict, schedules) -> int:
+    skipped = 0
+    rows = []
+
+    for row in schedules:
+        unit_step = FREQUENCY_STEPS.get((row["frequency"] or "").strip().lower())
+        if unit_step is None or row["account_id"] not in account_index:
+            skipped += 1
+            continue
+
+        amount = _cents(row["amount"])
+        if row["type"] == "expense":
+            amount = -abs(amount)
+        elif row["type"] == "income":
+            amount = abs(amount)
+
+        rows.append((
+            account_index[row["account_id"]],
+            amount,
+            unit_step,
+            row["next_execution"],
+            row["end_date"] or today + timedelta(days=flows.shape[1] - 1),
+            row["reference_day"] or row["next_execution"].day,
+        ))
+
+    if not rows:
+        return skipped
+
+    # Colunas dos agendamentos; cada grupo (unidade, passo[, dia]) é expandido de uma vez
+    account_idx = np.array([row[0] for row in rows], dtype=np.int64)
+    amounts = np.array([row[1] for row in rows], dtype=np.int64)
+    units = np.array([row[2][0] for row in rows])
+    steps = np.array([row[2][1] for row in rows], dtype=np.int64)
+    today_d = np.datetime64(today, "D")
+    next_execution = np.array([row[3] for row in rows], dtype="datetime64[D]")
+    end_dates = np.array([row[4] for row in rows], dtype="datetime64[D]")
+    days = np.clip(np.array([row[5] for row in rows], dtype=np.int64), 1, 31)
+
+    first = (next_execution - today_d).astype(np.int64)
+    last = (end_dates - today_d).astype(np.int64)
+    start_months = (
+        next_execution.astype("datetime64[M]") - today_d.astype("datetime64[M]")
+    ).astype(np.int64)
+
+    for step in np.unique(steps[units == "day"]):
+        group = (units == "day") & (steps == step)
+        _expand_day_steps(flows, account_idx[group], amounts[group], first[group], last[group], int(step))
+
+    month_groups = {(int(step), int(day)) for step, day in zip(steps[units == "month"], days[units == "month"])}
+    for step, day in month_groups:
+        group = (units == "month") & (steps == step) & (days == day)
+        _expand_month_steps(
+            flows, today, account_idx[group], amounts[group], start_months[group], day, last[group], step
+        )
+
+    return skipped
+
+
+def _add_dated_amounts(flows, today: date, account_index: dict, rows):
+    rows = [row for row in rows if row["account_id"] in account_index]
+    if not rows:
+        return
+
+    account_idx = np.fromiter((account_index[row["account_id"]] for row in rows), dtype=np.int64, count=len(rows))
+    offsets = np.fromiter(((row["date"] - today).days for row in rows), dtype=np.int64, count=len(rows))
+    amounts = np.fromiter((_cents(row["amount"]) for row in rows), dtype=np.int64, count=len(rows))
+    np.add.at(flows, (account_idx, offsets), amounts)
+
+
+def _summary(balances: np.ndarray, today: date) -> dict:
+    low = int(balances.argmin())
+    negative = np.flatnonzero(balances < 0)
+    return {
+        "end_balance": _money(balances[-1]),
+        "min_balance": _money(balances[low]),
+        "min_balance_date": today + timedelta(days=low),
+        "first_negative_date": today + timedelta(days=int(negative[0])) if negative.size else None,
+    }
+
+
+async def get_cash_flow_forecast(
+    session: AsyncSession,
+    user_id: UUID,
+    today: date,
+    days: int,
+    spending_trend_days: int | None = None
+) -> dict:
+    end_date = today + timedelta(days=days)
+    params = {"user_id": user_id, "today": today, "end_date": end_date}
+
+    accounts = (await session.execute(ACCOUNT_BALANCES_SQL, params)).mappings().all()
+    account_index = {row["id"]: i for i, row in enumerate(accounts)}
+
+    # Linha = conta, coluna = dia (0 = hoje); cada célula é o fluxo líquido do dia
+    flows = np.zeros((len(accounts), days + 1), dtype=np.int64)
+
+    _add_dated_amounts(flows, today, account_index, (await session.execute(FUTURE_TRANSACTIONS_SQL, params)).mappings().all())
+    _add_dated_amounts(flows, today, account_index, (await session.execute(STATEMENT_DUES_SQL, params)).mappings().all())
+    skipped = _add_schedules(flows, today, account_index, (await session.execute(SCHEDULES_SQL, params)).mappings().all())
+
+    # Gasto médio diário recente como tendência (opcional: agendamentos já executados também
+    # entram nessa média, então pode contar duas vezes o que já está em scheduled_transactions)
+    if spending_trend_days:
+        result = await session.execute(SPENDING_TREND_SQL, {**params, "trend_days": spending_trend_days})
+        for row in result.mappings().all():
+            if row["account_id"] in account_index:
+                flows[account_index[row["account_id"]], 1:] += round(_cents(row["amount"]) / spending_trend_days)
+
+    current = np.fromiter((_cents(row["balance"]) for row in accounts), dtype=np.int64, count=len(accounts))
+    balances = current[:, None] + flows.cumsum(axis=1)
+    totals = balances.sum(axis=0)
+
+    return {
+        "start_date": today,
+        "end_date": end_date,
+        "current_balance": _money(current.sum()),
+        **_summary(totals, today),
+        "accounts": [
+            {
+                "account_id": row["id"],
+                "name": row["name"],
+                "current_balance": _money(current[i]),
+                **_summary(balances[i], today),
+            }
+            for i, row in enumerate(accounts)
+        ],
+        "daily_balances": (totals / 100).round(2).tolist(),
+        "skipped_schedules": skipped,
+    }
@@ -1,41 +1,131 @@
-import os
-import google.generativeai as genai
-from dotenv import load_dotenv
+import asyncio
+import time
 
-load_dotenv()
+from config import Settings, get_settings
+from services.llm_providers import LLMProvider
+from services.llm_resilience import (
+    CircuitBreaker,
+    LatencyTracker,
+    LLMError,
+    LLMTimeoutError,
+    backoff_delay,
+)
 
 class LLMClient:
-    def __init__(self):
-        api_key = os.getenv("GOOGLE_API_KEY")
-
-        if not api_key:
-            raise RuntimeError("GOOGLE_API_KEY not found in environment variables")
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel("gemini-2.5-flash-lite")
-
-    async def chat(self, messages: list[dict]) -> str:
-        formatted_history = []
-
-        for msg in messages:
-            role = msg["role"]
-            content = msg["content"]
-            if role == "assistant":
-                role = "model"
-            elif role == "system":
-                role = "user" 
-            
-            formatted_history.append({
-                "role": role,
-                "parts": [content]
-            })
-
-        generation_config = genai.types.GenerationConfig(
-            temperature=0 # Defini como 0 pro modelo não inventar nada, da pra rever depois
+    # Chamada resiliente (deadline, hedge, retries, circuit breaker) em cima de um provider
+    def __init__(self, provider: LLMProvider, settings: Settings | None = None):
+        self.settings = settings or get_settings()
+        self.provider = provider
+        self.latency = LatencyTracker(
+            window=self.settings.llm_latency_window,
+            min_samples=self.settings.llm_latency_min_samples
         )
-
-        response = await self.model.generate_content_async(
-            formatted_history,
-            generation_config=generation_config
+        self.breaker = CircuitBreaker(
+            failure_threshold=self.settings.llm_breaker_failure_threshold,
+            reset_seconds=self.settings.llm_breaker_reset_seconds
         )
 
-        return response.text.strip()
\ No newline at end of file
+    @property
+    def name(self) -> str:
+        return self.provider.name
+
+    def hedge_delay(self) -> float:
+        # Até ter amostras suficientes usa o valor configurado, depois o percentil observado
+        observed = self.latency.percentile(self.settings.llm_hedge_percentile)
+        if observed is None:
+            return self.settings.llm_hedge_initial_delay_seconds
+        return max(self.settings.llm_hedge_min_delay_seconds, observed)
+
+    async def _call(self, messages: list[dict], censor: bool = True) -> str:
+        started = time.monotonic()
+
+        try:
+            text = await self.provider.complete(
+                messages,
+                temperature=0 # Defini como 0 pro modelo não inventar nada, da pra rever depois
+            )
+        except asyncio.CancelledError:
+            # Só a chamada original conta: a duplicata do hedge começou depois e subestimaria
+            if censor:
+                self.latency.record_censored(time.monotonic() - started)
+            raise
+        except Exception:
+            self.latency.record_error()
+            raise
+
+        self.latency.record(time.monotonic() - started)
+        return text
+
+    async def _hedged_call(self, messages: list[dict], deadline: float) -> str:
+        # Se a primeira chamada não voltar até o ponto de hedge, manda uma duplicata
+        # e fica com a que terminar primeiro
+        loop = asyncio.get_running_loop()
+        hedge_at = loop.time() + self.hedge_delay()
+        pending = {asyncio.create_task(self._call(messages))}
+        hedged = not self.settings.llm_hedge_enabled
+        error: BaseException | None = None
+
+        try:
+            while True:
+                now = loop.time()
+                if now >= deadline:
+                    raise LLMTimeoutError("LLM did not answer before the deadline")
+
+                if not hedged and now >= hedge_at:
+                    pending.add(asyncio.create_task(self._call(messages, censor=False)))
+                    hedged = True
+
+                wait_until = deadline if hedged else min(deadline, hedge_at)
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=max(0, wait_until - now),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+
+                if not pending and error is not None:
+                    raise error
+
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def chat(self, messages: list[dict], timeout: float | None = None) -> str:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or self.settings.llm_timeout_seconds)
+        attempt = 0
+
+        while True:
+            self.breaker.before_call()
+            attempt += 1
+
+            try:
+                text = await self._hedged_call(messages, deadline)
+            except asyncio.CancelledError:
+                self.breaker.record_cancelled()
+                raise
+            except Exception as e:
+                self.breaker.record_failure()
+
+                if attempt > self.settings.llm_max_retries:
+                    if isinstance(e, LLMError):
+                        raise
+                    raise LLMError(f"LLM request failed: {e}") from e
+
+                delay = backoff_delay(
+                    attempt,
+                    self.settings.llm_backoff_base_seconds,
+                    self.settings.llm_backoff_max_seconds
+                )
+                if loop.time() + delay >= deadline:
+                    raise LLMTimeoutError("LLM did not answer before the deadline") from e
+
+                await asyncio.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            return text
@@ -0,0 +1,156 @@
+import asyncio
+import random
+import re
+from typing import Callable, Protocol
+
+
+class Completion(str):
+    # Texto da resposta com a contagem de tokens que o provider devolveu (None se ele não informa).
+    # Continua sendo str, então quem só quer o texto (LLMClient, ChatService) não muda nada
+    prompt_tokens: int | None
+    completion_tokens: int | None
+
+    def __new__(cls, text: str, prompt_tokens: int | None = None, completion_tokens: int | None = None):
+        completion = super().__new__(cls, text)
+        completion.prompt_tokens = prompt_tokens
+        completion.completion_tokens = completion_tokens
+        return completion
+
+
+class LLMProvider(Protocol):
+    # Recebe mensagens no formato {"role": "system"|"user"|"assistant", "content": str}
+    name: str
+    fast: bool
+
+    async def complete(self, messages: list[dict], temperature: float = 0) -> str:
+        ...
+
+
+class GeminiProvider:
+    def __init__(self, api_key: str, model_name: str = "gemini-2.5-flash-lite", fast: bool = False):
+        # Import pesado, só acontece quando o provider é criado (primeiro request ou warm-up)
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+        self.name = f"gemini:{model_name}"
+        self.fast = fast
+
+    def _format_history(self, messages: list[dict]) -> list[dict]:
+        formatted_history = []
+
+        for msg in messages:
+            role = msg["role"]
+            content = msg["content"]
+            if role == "assistant":
+                role = "model"
+            elif role == "system":
+                role = "user"
+
+            formatted_history.append({
+                "role": role,
+                "parts": [content]
+            })
+
+        return formatted_history
+
+    async def complete(self, messages: list[dict], temperature: float = 0) -> str:
+        response = await self.model.generate_content_async(
+            self._format_history(messages),
+            generation_config={"temperature": temperature}
+        )
+        usage = getattr(response, "usage_metadata", None)
+        return Completion(
+            response.text.strip(),
+            getattr(usage, "prompt_token_count", None),
+            getattr(usage, "candidates_token_count", None)
+        )
+
+
+class OpenAICompatibleProvider:
+    # Qualquer servidor com POST /chat/completions (OpenAI, vLLM, llama.cpp, Ollama, ...)
+    def __init__(self, base_url: str, model_name: str, api_key: str | None = None, fast: bool = False):
+        import httpx
+
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.client = httpx.AsyncClient(base_url=base_url.rstrip("/"), headers=headers, timeout=None)
+        self.model_name = model_name
+        self.name = f"openai:{model_name}"
+        self.fast = fast
+
+    async def complete(self, messages: list[dict], temperature: float = 0) -> str:
+        response = await self.client.post(
+            "/chat/completions",
+            json={
+                "model": self.model_name,
+                "messages": messages,
+                "temperature": temperature,
+            }
+        )
+        response.raise_for_status()
+        data = response.json()
+        usage = data.get("usage") or {}
+        return Completion(
+            data["choices"][0]["message"]["content"].strip(),
+            usage.get("prompt_tokens"),
+            usage.get("completion_tokens")
+        )
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+_USER_ID_RE = re.compile(r"user_id = '([0-9a-fA-F-]{36})'")
+
+class StubProvider:
+    """
+    Provider offline e determinístico, pra rodar o pipeline inteiro sem rede.
+
+    responses: texto fixo, ou função que recebe as mensagens e devolve o texto.
+        Por padrão lista as últimas transações do user_id da mensagem.
+    latency: segundos fixos, ou função sem argumentos que devolve os segundos de cada chamada
+    failure_rate: probabilidade de cada chamada levantar erro (depois da latência)
+    """
+
+    def __init__(
+        self,
+        responses: str | Callable[[list[dict]], str] | None = None,
+        latency: float | Callable[[], float] = 0.0,
+        failure_rate: float = 0.0,
+        seed: int | None = None,
+        name: str = "stub",
+        fast: bool = True
+    ):
+        self.responses = responses
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.name = name
+        self.fast = fast
+        self.calls = 0
+
+    def _default_response(self, messages: list[dict]) -> str:
+        match = _USER_ID_RE.search(messages[-1]["content"])
+        user_id = match.group(1) if match else "00000000-0000-0000-0000-000000000000"
+        return (
+            "SELECT *\n"
+            "FROM transactions\n"
+            f"WHERE user_id = '{user_id}'\n"
+            "ORDER BY date DESC\n"
+            "LIMIT 20;"
+        )
+
+    async def complete(self, messages: list[dict], temperature: float = 0) -> str:
+        self.calls += 1
+
+        latency = self.latency() if callable(self.latency) else self.latency
+        await asyncio.sleep(latency)
+
+        if self.random.random() < self.failure_rate:
+            raise RuntimeError("stub provider failure")
+
+        if self.responses is None:
+            return self._default_response(messages)
+        if callable(self.responses):
+            return self.responses(messages)
+        return self.responses
@@ -0,0 +1,102 @@
+import math
+import random
+import time
+from collections import deque
+
+
+class LLMError(RuntimeError):
+    pass
+
+
+class LLMTimeoutError(LLMError):
+    pass
+
+
+class LLMUnavailableError(LLMError):
+    pass
+
+
+class LatencyTracker:
+    # Janela das últimas latências com sucesso, usada pra decidir quando mandar o hedge,
+    # e dos últimos resultados (sucesso/erro), usada pelo roteamento entre providers
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.samples: deque[float] = deque(maxlen=window)
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+        self.outcomes.append(True)
+
+    def record_censored(self, seconds: float):
+        # Chamada cancelada (perdeu o hedge, estourou o deadline): a latência real é pelo menos
+        # essa. Sem isso a cauda some da janela e o ponto de hedge vai encolhendo sozinho
+        self.samples.append(seconds)
+
+    def record_error(self):
+        self.outcomes.append(False)
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def percentile(self, p: float) -> float | None:
+        if len(self.samples) < self.min_samples:
+            return None
+
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    # closed -> open depois de N falhas seguidas; open -> half_open depois de reset_seconds;
+    # em half_open passa uma chamada de teste, sucesso fecha e falha abre de novo
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+
+    def is_available(self) -> bool:
+        if self.state == "open":
+            return self.clock() - self.opened_at >= self.reset_seconds
+        return not (self.state == "half_open" and self.probe_in_flight)
+
+    def before_call(self):
+        if self.state == "open":
+            if self.clock() - self.opened_at < self.reset_seconds:
+                raise LLMUnavailableError("LLM provider is degraded, try again shortly")
+            self.state = "half_open"
+            self.probe_in_flight = False
+
+        if self.state == "half_open":
+            if self.probe_in_flight:
+                raise LLMUnavailableError("LLM provider is degraded, try again shortly")
+            self.probe_in_flight = True
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self.probe_in_flight = False
+
+    def record_cancelled(self):
+        # A chamada de teste foi cancelada sem resultado: libera pra próxima testar
+        self.probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.probe_in_flight = False
+
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = self.clock()
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    # Exponential backoff com full jitter
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
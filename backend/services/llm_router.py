@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import random
+import re
+from functools import lru_cache
+
+from config import Settings, get_settings
+from services.llm_client import LLMClient
+from services.llm_providers import GeminiProvider, OpenAICompatibleProvider, StubProvider
+from services.llm_resilience import LLMError, LLMTimeoutError, LLMUnavailableError
+
+logger = logging.getLogger(__name__)
+
+# Prefixo que o ChatService põe antes da pergunta (_build_prompt)
+_USER_ID_PREFIX = re.compile(r"^user_id = '[^']*'\n\n")
+
+
+class LLMRouter:
+    # Mesma interface do LLMClient (chat), mas escolhe o provider a cada request
+    # pelas estatísticas recentes de latência e erro de cada um
+    def __init__(self, clients: list[LLMClient], settings: Settings | None = None, seed: int | None = None):
+        if not clients:
+            raise RuntimeError("No LLM provider configured")
+
+        self.settings = settings or get_settings()
+        self.clients = clients
+        self.random = random.Random(seed)
+
+    def _score(self, client: LLMClient) -> float:
+        # Sem amostras suficientes usa uma latência a priori; a taxa de erro pesa do mesmo jeito,
+        # senão um provider que só falha nunca junta amostras e fica sempre em primeiro
+        p50 = client.latency.percentile(50)
+        if p50 is None:
+            p50 = self.settings.llm_router_prior_latency_seconds
+        return p50 * (1 + self.settings.llm_router_error_penalty * client.latency.error_rate())
+
+    def _budget(self, client: LLMClient, remaining: float, providers_left: int) -> float:
+        # Cada provider recebe uma fatia do deadline (o p95 dele ou uma parte igual do que sobra),
+        # pra um provider travado não levar o tempo todo; o último fica com o resto
+        if providers_left <= 1:
+            return remaining
+        p95 = client.latency.percentile(self.settings.llm_hedge_percentile)
+        return min(remaining, max(p95 or 0.0, remaining / providers_left))
+
+    def _is_short(self, messages: list[dict]) -> bool:
+        # Conta só o texto do usuário, sem o prefixo com o user_id
+        question = _USER_ID_PREFIX.sub("", messages[-1]["content"], count=1)
+        return len(question) <= self.settings.llm_router_short_message_chars
+
+    def rank(self, messages: list[dict]) -> list[LLMClient]:
+        available = [client for client in self.clients if client.breaker.is_available()]
+        if not available:
+            raise LLMUnavailableError("Every LLM provider is degraded, try again shortly")
+
+        ranked = sorted(available, key=self._score)
+
+        # Mensagem curta vai primeiro pros modelos marcados como fast (mais baratos/rápidos)
+        if self._is_short(messages):
+            ranked.sort(key=lambda client: not client.provider.fast)
+
+        # Uma fração pequena do tráfego explora outro provider pra manter as estatísticas atualizadas
+        if len(ranked) > 1 and self.random.random() < self.settings.llm_router_explore_rate:
+            explored = ranked.pop(self.random.randrange(1, len(ranked)))
+            ranked.insert(0, explored)
+
+        return ranked
+
+    async def chat(self, messages: list[dict], timeout: float | None = None) -> str:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or self.settings.llm_timeout_seconds)
+        error: LLMError | None = None
+
+        ranked = self.rank(messages)
+
+        for position, client in enumerate(ranked):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise LLMTimeoutError("LLM did not answer before the deadline")
+
+            try:
+                return await client.chat(messages, timeout=self._budget(client, remaining, len(ranked) - position))
+            except LLMError as e:
+                logger.warning("LLM provider %s failed: %s", client.name, e)
+                error = e
+
+        raise error
+
+    async def aclose(self):
+        for client in self.clients:
+            close = getattr(client.provider, "aclose", None)
+            if close is not None:
+                await close()
+
+
+def build_providers(settings: Settings) -> list:
+    providers = []
+
+    for kind in (item.strip() for item in settings.llm_providers.split(",")):
+        if kind == "gemini":
+            if not settings.google_api_key:
+                raise RuntimeError("GOOGLE_API_KEY not found in environment variables")
+            providers.append(GeminiProvider(settings.google_api_key, settings.gemini_model))
+            if settings.gemini_fast_model:
+                providers.append(GeminiProvider(settings.google_api_key, settings.gemini_fast_model, fast=True))
+
+        elif kind == "openai":
+            if not settings.openai_base_url:
+                raise RuntimeError("OPENAI_BASE_URL not found in environment variables")
+            providers.append(OpenAICompatibleProvider(
+                settings.openai_base_url, settings.openai_model, settings.openai_api_key
+            ))
+            if settings.openai_fast_model:
+                providers.append(OpenAICompatibleProvider(
+                    settings.openai_base_url, settings.openai_fast_model, settings.openai_api_key, fast=True
+                ))
+
+        elif kind == "stub":
+            providers.append(StubProvider())
+
+        elif kind:
+            raise RuntimeError(f"Unknown LLM provider: {kind}")
+
+    return providers
+
+
+@lru_cache
+def get_llm_router() -> LLMRouter:
+    settings = get_settings()
+    clients = [LLMClient(provider, settings) for provider in build_providers(settings)]
+    return LLMRouter(clients, settings)
+
+
+async def close_llm_router():
+    if get_llm_router.cache_info().currsize:
+        await get_llm_router().aclose()
+        get_llm_router.cache_clear()
@@ -0,0 +1,71 @@
+from datetime import date
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import text
+
+# search_vector @@ usa idx_transactions_search_vector e ILIKE usa idx_transactions_description_trgm,
+# os dois já começam por user_id
+SEARCH_SQL = """
+SELECT
+    t.id,
+    t.date,
+    t.amount,
+    t.description,
+    t.type,
+    t.status,
+    t.account_id,
+    t.category_id,
+    t.credit_card_id,
+    ts_rank_cd(
+        t.search_vector,
+        websearch_to_tsquery('portuguese', :query) || websearch_to_tsquery('english', :query)
+    ) + similarity(t.description, :query) AS rank
+FROM transactions t
+WHERE t.user_id = :user_id
+  AND (
+      t.search_vector @@ (websearch_to_tsquery('portuguese', :query) || websearch_to_tsquery('english', :query))
+      OR t.description ILIKE :pattern
+  )
+  {date_filter}
+ORDER BY rank DESC, t.date DESC
+LIMIT :limit
+"""
+
+
+def _like_pattern(query: str) -> str:
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+async def search_transactions(
+    session: AsyncSession,
+    user_id: UUID,
+    query: str,
+    limit: int = 50,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> list[dict]:
+    query = query.strip()
+    params = {
+        "user_id": user_id,
+        "query": query,
+        "pattern": _like_pattern(query),
+        "limit": limit,
+    }
+    date_filter = []
+
+    if start_date is not None:
+        date_filter.append("AND t.date >= :start_date")
+        params["start_date"] = start_date
+    if end_date is not None:
+        date_filter.append("AND t.date <= :end_date")
+        params["end_date"] = end_date
+
+    result = await session.execute(
+        text(SEARCH_SQL.format(date_filter="\n  ".join(date_filter))),
+        params
+    )
+
+    return [dict(row) for row in result.mappings().all()]
@@ -1,22 +1,114 @@
+import asyncio
+from uuid import UUID
+
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import text
 
+from config import get_settings
+from database.session import get_sessionmaker
+from services.sql_guard import (
+    NARROW_HINT,
+    QueryRejected,
+    guard_sql,
+    set_statement_timeout,
+)
+from services.sql_validator import validate_read_only_sql, validate_user_scope
+
+QUERY_CANCELED = "57014"
+
+
+def _is_timeout(error: DBAPIError) -> bool:
+    code = getattr(error.orig, "pgcode", None) or getattr(error.orig, "sqlstate", None)
+    return code == QUERY_CANCELED
+
+
+async def set_query_scope(session: AsyncSession, user_id: UUID, role: str):
+    # Equivalente a SET LOCAL app.user_id / SET LOCAL ROLE: vale até o fim da transação.
+    # O role vem por último, depois dele set_config não pode mais ser chamado
+    await session.execute(
+        text("SELECT set_config('app.user_id', :user_id, true)"),
+        {"user_id": str(user_id)}
+    )
+    await session.execute(
+        text("SELECT set_config('role', :role, true)"),
+        {"role": role}
+    )
+
+
 async def execute_sql(
     session: AsyncSession,
-    sql: str
+    sql: str,
+    user_id: UUID,
+    timeout_ms: int | None = None
 ):
-    result = await session.execute(text(sql))
+    # SQL gerado pela LLM só lê, e só os dados do usuário atual. O validador só recusa cedo
+    # o que é obviamente errado; quem garante é o banco (READ ONLY + role com RLS)
+    validate_read_only_sql(sql)
+    validate_user_scope(sql, user_id)
+
+    settings = get_settings()
+    timeout_ms = timeout_ms or settings.sql_statement_timeout_ms
 
-    if sql.strip().lower().startswith("select"):
-        rows = result.mappings().all()
-        return {
-            "type": "select",
-            "rows": rows
-        }
+    try:
+        await session.execute(text("SET TRANSACTION READ ONLY"))
+        await set_statement_timeout(session, timeout_ms)
+        await set_query_scope(session, user_id, settings.sql_query_role)
+        sql = await guard_sql(session, sql)
+        result = await session.execute(text(sql))
 
-    await session.commit()
+    except QueryRejected:
+        await session.rollback()
+        raise
+
+    except DBAPIError as e:
+        await session.rollback()
+        if _is_timeout(e):
+            raise QueryRejected(
+                f"The query took longer than {timeout_ms} ms and was canceled. {NARROW_HINT}"
+            ) from e
+        raise
+
+    rows = [dict(row) for row in result.mappings().all()]
+    await session.rollback()
 
     return {
-        "type": "mutation",
-        "affected_rows": result.rowcount
+        "type": "select",
+        "sql": sql,
+        "rows": rows
     }
+
+
+async def _execute_plan_step(step: dict, user_id: UUID, timeout_ms: int | None):
+    # Cada statement do plano numa sessão própria, ou seja, numa conexão própria do pool
+    async with get_sessionmaker()() as session:
+        try:
+            result = await execute_sql(session, step["sql"], user_id, timeout_ms)
+        except (ValueError, DBAPIError) as e:
+            # Recusa (validador, guard) ou erro do banco (coluna inventada, ...) fica só nesse item
+            await session.rollback()
+            return {
+                "label": step["label"],
+                "sql": step["sql"],
+                "type": "select",
+                "error": str(e.orig) if isinstance(e, DBAPIError) else str(e),
+                "estimated_cost": getattr(e, "estimated_cost", None),
+                "estimated_rows": getattr(e, "estimated_rows", None)
+            }
+
+    return {"label": step["label"], **result}
+
+
+async def execute_plan(plan: list[dict], user_id: UUID, timeout_ms: int | None = None):
+    results = await asyncio.gather(
+        *(_execute_plan_step(step, user_id, timeout_ms) for step in plan),
+        return_exceptions=True
+    )
+
+    # Statement recusado ou com erro no banco vira erro só no próprio item; o resto (conexão,
+    # cancelamento, ...) derruba o plano
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+    return results
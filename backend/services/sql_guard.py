@@ -0,0 +1,154 @@
+import json
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import text
+
+from config import get_settings
+
+# Limites do plano estimado pelo EXPLAIN antes de rodar o SQL gerado pela LLM
+# vêm de Settings (sql_max_plan_cost, sql_max_plan_rows, sql_auto_limit_rows, ...)
+
+NARROW_HINT = (
+    "Try narrowing the question, for example to a shorter date range, "
+    "a specific account or a specific category."
+)
+
+# LIMIT/OFFSET, INTERVAL e datas mudam o custo do plano, então ficam no formato; o resto
+# dos literais (user_id, valores, palavras da busca) vira ?
+_LITERAL = re.compile(
+    r"(?P<keep>\b(?:limit|offset)\s+\d+|\binterval\s+'(?:[^']|'')*'|'\d{4}-\d{2}-\d{2}')"
+    r"|(?P<string>'(?:[^']|'')*')"
+    r"|(?P<number>\b\d+(?:\.\d+)?\b)",
+    re.I
+)
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_LIMIT = re.compile(r"\blimit\s+\d+\s*(offset\s+\d+\s*)?$", re.I)
+
+
+class QueryRejected(ValueError):
+    def __init__(self, message: str, estimated_cost: float | None = None, estimated_rows: int | None = None):
+        super().__init__(message)
+        self.estimated_cost = estimated_cost
+        self.estimated_rows = estimated_rows
+
+
+@dataclass(frozen=True)
+class PlanVerdict:
+    action: str  # "run", "limit" ou "reject"
+    estimated_cost: float
+    estimated_rows: int
+    reason: str | None = None
+
+
+# Veredito por formato de statement (literais trocados por ?), o mesmo formato
+# gerado pra outro usuário ou outra data não precisa de outro EXPLAIN
+_verdict_cache: "OrderedDict[str, PlanVerdict]" = OrderedDict()
+
+
+def statement_shape(sql: str) -> str:
+    shape = _LITERAL.sub(lambda match: match.group("keep") or "?", sql)
+    return _WHITESPACE.sub(" ", shape).strip().rstrip(";").strip().lower()
+
+
+def apply_limit(sql: str, limit: int | None = None) -> str:
+    limit = limit or get_settings().sql_auto_limit_rows
+    sql = sql.strip().rstrip(";").rstrip()
+    if _TRAILING_LIMIT.search(sql):
+        return f"SELECT * FROM ({sql}) AS limited LIMIT {limit}"
+    return f"{sql}\nLIMIT {limit}"
+
+
+def _cache_get(shape: str) -> PlanVerdict | None:
+    verdict = _verdict_cache.get(shape)
+    if verdict is not None:
+        _verdict_cache.move_to_end(shape)
+    return verdict
+
+
+def _cache_put(shape: str, verdict: PlanVerdict):
+    _verdict_cache[shape] = verdict
+    _verdict_cache.move_to_end(shape)
+    while len(_verdict_cache) > get_settings().sql_verdict_cache_size:
+        _verdict_cache.popitem(last=False)
+
+
+async def _explain(session: AsyncSession, sql: str) -> tuple[float, int]:
+    result = await session.execute(text(f"EXPLAIN (FORMAT JSON) {sql.strip().rstrip(';')}"))
+    plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    root = plan[0]["Plan"]
+    rows = root["Plan Rows"]
+
+    # Em INSERT/UPDATE/DELETE a raiz é ModifyTable, que estima 0 linhas sem RETURNING:
+    # as linhas afetadas são as que o nó filho produz
+    if root["Node Type"] == "ModifyTable" and root.get("Plans"):
+        rows = root["Plans"][0]["Plan Rows"]
+
+    return float(root["Total Cost"]), int(rows)
+
+
+async def _evaluate(session: AsyncSession, sql: str) -> PlanVerdict:
+    settings = get_settings()
+    max_cost = settings.sql_max_plan_cost
+    max_rows = settings.sql_max_plan_rows
+
+    cost, rows = await _explain(session, sql)
+    is_select = sql.strip().lower().startswith(("select", "with"))
+
+    if rows > max_rows:
+        if not is_select:
+            return PlanVerdict(
+                "reject", cost, rows,
+                f"The statement would change about {rows} rows (limit {max_rows}). {NARROW_HINT}"
+            )
+
+        limited_cost, limited_rows = await _explain(session, apply_limit(sql))
+        if limited_cost <= max_cost:
+            return PlanVerdict("limit", limited_cost, limited_rows)
+        cost, rows = limited_cost, limited_rows
+
+    if cost > max_cost:
+        return PlanVerdict(
+            "reject", cost, rows,
+            f"The query is too expensive to run (estimated cost {cost:.0f}, limit {max_cost:.0f}). {NARROW_HINT}"
+        )
+
+    if rows > max_rows:
+        return PlanVerdict(
+            "reject", cost, rows,
+            f"The query would return about {rows} rows (limit {max_rows}). {NARROW_HINT}"
+        )
+
+    return PlanVerdict("run", cost, rows)
+
+
+async def guard_sql(session: AsyncSession, sql: str, cache: bool = True) -> str:
+    # Devolve o SQL que pode ser executado (talvez com LIMIT) ou levanta QueryRejected
+    shape = statement_shape(sql)
+    verdict = _cache_get(shape) if cache else None
+
+    if verdict is None:
+        verdict = await _evaluate(session, sql)
+        if cache:
+            _cache_put(shape, verdict)
+
+    if verdict.action == "reject":
+        raise QueryRejected(verdict.reason, verdict.estimated_cost, verdict.estimated_rows)
+
+    if verdict.action == "limit":
+        return apply_limit(sql)
+
+    return sql
+
+
+async def set_statement_timeout(session: AsyncSession, timeout_ms: int):
+    # Vale só até o fim da transação atual (equivalente a SET LOCAL)
+    await session.execute(
+        text("SELECT set_config('statement_timeout', :timeout, true)"),
+        {"timeout": f"{timeout_ms}ms"}
+    )
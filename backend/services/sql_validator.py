@@ -1,6 +1,10 @@
 import re
 
 FORBIDDEN = re.compile(r"\b(drop|delete|truncate|alter)\b", re.I)
+# Dados de outros usuários ou troca de configuração da sessão (role, statement_timeout, ...)
+OUT_OF_SCOPE = re.compile(r"\b(users|password_hash|set_config|current_setting|pg_\w+)\b", re.I)
+NEGATED_USER_FILTER = re.compile(r"\buser_id\s*(<>|!=|\bnot\b|\bis\s+distinct\b)", re.I)
+UUID_LITERAL = re.compile(r"'([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})'", re.I)
 
 def validate_sql(sql: str):
     if FORBIDDEN.search(sql):
@@ -14,3 +18,23 @@ def validate_sql(sql: str):
 
     if sql.strip().lower().startswith("update") and "where" not in sql.lower():
         raise ValueError("UPDATE without WHERE is not allowed")
+
+def validate_read_only_sql(sql: str):
+    validate_sql(sql)
+
+    if not sql.strip().lower().startswith(("select", "with")):
+        raise ValueError("Only SELECT statements can be executed")
+
+def validate_user_scope(sql: str, user_id):
+    # Checagem textual, só pra recusar cedo: o SQL precisa citar o usuário atual e não pode
+    # tocar na tabela de usuários nem em configuração da sessão. O isolamento de verdade é a
+    # RLS do role em que sql_executor roda o SQL
+    if OUT_OF_SCOPE.search(sql):
+        raise ValueError("The query references data outside the current user")
+
+    if NEGATED_USER_FILTER.search(sql):
+        raise ValueError("The query must filter by the current user_id")
+
+    literals = {literal.lower() for literal in UUID_LITERAL.findall(sql)}
+    if str(user_id).lower() not in literals:
+        raise ValueError("The query must filter by the current user_id")
@@ -0,0 +1,49 @@
+import asyncio
+import logging
+import time
+import uuid
+
+from config import Settings
+from database.session import get_sessionmaker, warm_up_pool
+from services.llm_router import get_llm_router
+from services.prompts import prompt_examples
+from services.sql_guard import guard_sql, QueryRejected
+
+logger = logging.getLogger(__name__)
+
+
+async def _prime_llm_router():
+    # Importa os SDKs e configura os providers fora do caminho do primeiro request
+    await asyncio.to_thread(get_llm_router)
+
+
+async def _prime_planner():
+    # Os few-shot do prompt são os formatos de SQL mais comuns: o EXPLAIN deixa catálogo e
+    # estatísticas das tabelas carregados. O veredito não vai pro cache, porque é de um usuário
+    # sem dados e não vale pros usuários reais
+    placeholder_user = str(uuid.uuid4())
+
+    async with get_sessionmaker()() as session:
+        for _, sql in prompt_examples():
+            try:
+                await guard_sql(session, sql.replace("{user_id}", placeholder_user), cache=False)
+            except QueryRejected:
+                pass
+        await session.rollback()
+
+
+async def warm_up(settings: Settings):
+    started = time.perf_counter()
+
+    steps = {
+        "pool": warm_up_pool(settings.warmup_connections),
+        "llm_router": _prime_llm_router(),
+        "planner": _prime_planner(),
+    }
+    results = await asyncio.gather(*steps.values(), return_exceptions=True)
+
+    for name, result in zip(steps, results):
+        if isinstance(result, Exception):
+            logger.warning("Warm-up step %s failed: %s", name, result)
+
+    logger.info("Warm-up finished in %.0f ms", (time.perf_counter() - started) * 1000)
@@ -0,0 +1,214 @@
+"""
+LLMClient / CircuitBreaker / LLMRouter contra o StubProvider, sem rede.
+
+Uso (dentro de backend/):
+    python -m unittest discover -s tests
+"""
+import asyncio
+import time
+import unittest
+
+from config import Settings
+from services.llm_client import LLMClient
+from services.llm_providers import StubProvider
+from services.llm_resilience import (
+    CircuitBreaker,
+    LLMError,
+    LLMTimeoutError,
+    LLMUnavailableError,
+)
+from services.llm_router import LLMRouter
+
+MESSAGES = [{"role": "user", "content": "user_id = '00000000-0000-0000-0000-000000000000'\n\nHow much?"}]
+
+
+def make_settings(**overrides) -> Settings:
+    values = {
+        "database_url": "postgresql+asyncpg://test/test",
+        "secret_key": "test",
+        "llm_timeout_seconds": 2,
+        "llm_hedge_enabled": True,
+        "llm_hedge_initial_delay_seconds": 0.05,
+        "llm_hedge_min_delay_seconds": 0.01,
+        "llm_max_retries": 0,
+        "llm_backoff_base_seconds": 0.01,
+        "llm_backoff_max_seconds": 0.01,
+        "llm_breaker_failure_threshold": 2,
+        "llm_breaker_reset_seconds": 30,
+        "llm_router_explore_rate": 0,
+    }
+    values.update(overrides)
+    return Settings(**values)
+
+
+def latencies(*values: float):
+    # Latência de cada chamada, em ordem; a última se repete
+    values = list(values)
+    return lambda: values.pop(0) if len(values) > 1 else values[0]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30, clock=self.clock)
+
+    def test_opens_after_threshold(self):
+        for _ in range(2):
+            self.breaker.before_call()
+            self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, "open")
+        self.assertFalse(self.breaker.is_available())
+        with self.assertRaises(LLMUnavailableError):
+            self.breaker.before_call()
+
+    def test_half_open_allows_a_single_probe(self):
+        self.breaker.state = "open"
+        self.breaker.opened_at = self.clock.now
+        self.clock.now += 30
+
+        self.breaker.before_call()
+        self.assertEqual(self.breaker.state, "half_open")
+        with self.assertRaises(LLMUnavailableError):
+            self.breaker.before_call()
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_failed_probe_reopens(self):
+        self.breaker.state = "open"
+        self.breaker.opened_at = self.clock.now
+        self.clock.now += 30
+
+        self.breaker.before_call()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, "open")
+        self.assertEqual(self.breaker.opened_at, self.clock.now)
+
+
+class LLMClientTest(unittest.IsolatedAsyncioTestCase):
+    async def test_fast_answer_does_not_hedge(self):
+        provider = StubProvider("SELECT 1", latency=0.01)
+        client = LLMClient(provider, make_settings())
+
+        self.assertEqual(await client.chat(MESSAGES), "SELECT 1")
+        self.assertEqual(provider.calls, 1)
+
+    async def test_hedge_fires_at_hedge_delay(self):
+        provider = StubProvider("SELECT 1", latency=latencies(1.0, 0.01))
+        client = LLMClient(provider, make_settings())
+
+        started = time.monotonic()
+        self.assertEqual(await client.chat(MESSAGES), "SELECT 1")
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(provider.calls, 2)
+        self.assertGreaterEqual(elapsed, 0.05)
+        self.assertLess(elapsed, 0.5)
+
+    async def test_cancelled_primary_is_recorded_as_censored_sample(self):
+        provider = StubProvider("SELECT 1", latency=latencies(1.0, 0.01))
+        client = LLMClient(provider, make_settings())
+
+        await client.chat(MESSAGES)
+        await asyncio.sleep(0.01)  # deixa a chamada original processar o cancelamento
+
+        # A duplicata venceu (~0.01 s); a original entra com o tempo que já tinha (~0.06 s)
+        self.assertEqual(len(client.latency.samples), 2)
+        self.assertGreater(max(client.latency.samples), 0.05)
+        self.assertEqual(client.latency.error_rate(), 0.0)
+
+    async def test_deadline_raises_timeout(self):
+        provider = StubProvider("SELECT 1", latency=1.0)
+        client = LLMClient(provider, make_settings(llm_hedge_enabled=False))
+
+        started = time.monotonic()
+        with self.assertRaises(LLMTimeoutError):
+            await client.chat(MESSAGES, timeout=0.1)
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    async def test_failures_open_breaker_then_probe_closes_it(self):
+        provider = StubProvider("SELECT 1", failure_rate=1.0)
+        client = LLMClient(provider, make_settings())
+        clock = FakeClock()
+        client.breaker.clock = clock
+
+        for _ in range(2):
+            with self.assertRaises(LLMError):
+                await client.chat(MESSAGES)
+
+        self.assertEqual(client.breaker.state, "open")
+        with self.assertRaises(LLMUnavailableError):
+            await client.chat(MESSAGES)
+        self.assertEqual(provider.calls, 2)
+
+        clock.now += 30
+        provider.failure_rate = 0.0
+        self.assertEqual(await client.chat(MESSAGES), "SELECT 1")
+        self.assertEqual(client.breaker.state, "closed")
+
+    async def test_cancelled_probe_frees_the_breaker(self):
+        provider = StubProvider("SELECT 1", latency=1.0)
+        client = LLMClient(provider, make_settings(llm_hedge_enabled=False))
+        clock = FakeClock()
+        client.breaker.clock = clock
+        client.breaker.state = "open"
+        client.breaker.opened_at = clock.now
+        clock.now += 30
+
+        probe = asyncio.create_task(client.chat(MESSAGES))
+        await asyncio.sleep(0.01)
+        self.assertTrue(client.breaker.probe_in_flight)
+        self.assertFalse(client.breaker.is_available())
+
+        probe.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await probe
+
+        self.assertFalse(client.breaker.probe_in_flight)
+        self.assertTrue(client.breaker.is_available())
+
+
+class LLMRouterTest(unittest.IsolatedAsyncioTestCase):
+    async def test_falls_back_when_first_provider_fails(self):
+        settings = make_settings()
+        failing = StubProvider("SELECT 1", failure_rate=1.0, name="failing")
+        working = StubProvider("SELECT 2", name="working")
+        router = LLMRouter([LLMClient(failing, settings), LLMClient(working, settings)], settings, seed=0)
+
+        self.assertEqual(await router.chat(MESSAGES), "SELECT 2")
+        self.assertEqual(failing.calls, 1)
+        self.assertEqual(working.calls, 1)
+
+    async def test_hung_provider_gets_only_a_slice_of_the_deadline(self):
+        settings = make_settings(llm_hedge_enabled=False)
+        hung = StubProvider("SELECT 1", latency=10.0, name="hung")
+        working = StubProvider("SELECT 2", latency=0.01, name="working")
+        router = LLMRouter([LLMClient(hung, settings), LLMClient(working, settings)], settings, seed=0)
+
+        started = time.monotonic()
+        self.assertEqual(await router.chat(MESSAGES, timeout=1.0), "SELECT 2")
+        self.assertLess(time.monotonic() - started, 0.8)
+
+    def test_short_message_ignores_user_id_prefix(self):
+        settings = make_settings(llm_router_short_message_chars=20)
+        router = LLMRouter([LLMClient(StubProvider(), settings)], settings)
+
+        self.assertTrue(router._is_short(MESSAGES))
+        self.assertFalse(router._is_short([{
+            "role": "user",
+            "content": "user_id = '00000000-0000-0000-0000-000000000000'\n\n" + "x" * 21
+        }]))
+
+
+if __name__ == "__main__":
+    unittest.main()
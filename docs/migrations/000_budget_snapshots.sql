@@ -0,0 +1,110 @@
+-- Snapshot de consumo dos orçamentos (budget_snapshots), mantido por trigger.
+-- Roda antes de 001_partition_transactions.sql, que recria o trigger de transactions
+-- na tabela particionada. Funções e triggers são os mesmos de docs/model.sql.
+
+-- Fora de transação (CONCURRENTLY)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_user_date ON transactions (user_id, date);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_budgets_user_period ON budgets (user_id, end_date, start_date);
+
+BEGIN;
+
+CREATE TABLE budget_snapshots (
+  budget_id UUID PRIMARY KEY,
+  user_id UUID NOT NULL,
+  spent_amount NUMERIC(18,2) NOT NULL DEFAULT 0,
+  transaction_count INT NOT NULL DEFAULT 0,
+  refreshed_at TIMESTAMPTZ DEFAULT now(),
+
+  CONSTRAINT fk_budget_snapshot_budget
+    FOREIGN KEY (budget_id) REFERENCES budgets(id) ON DELETE CASCADE,
+
+  CONSTRAINT fk_budget_snapshot_user
+    FOREIGN KEY (user_id) REFERENCES users(id)
+);
+
+-- Rebuild e delta do mesmo usuário se serializam por esse lock (até o COMMIT). Sem ele um
+-- orçamento criado junto com uma despesa na janela perde a despesa: o delta não vê o snapshot
+-- ainda não commitado e o rebuild não vê a transação. Com o lock, o segundo comando da função
+-- roda com um snapshot novo, depois do COMMIT do outro, e enxerga a linha dele
+CREATE OR REPLACE FUNCTION lock_budget_snapshots(p_user_id UUID)
+RETURNS void AS $$
+  SELECT pg_advisory_xact_lock(hashtext('budget_snapshots'), hashtext(p_user_id::text));
+$$ LANGUAGE sql;
+
+-- Recalcula do zero o snapshot de um orçamento (criação ou mudança de período)
+CREATE OR REPLACE FUNCTION rebuild_budget_snapshot(p_budget_id UUID)
+RETURNS void AS $$
+  SELECT lock_budget_snapshots(user_id) FROM budgets WHERE id = p_budget_id;
+
+  INSERT INTO budget_snapshots (budget_id, user_id, spent_amount, transaction_count, refreshed_at)
+  SELECT b.id, b.user_id, COALESCE(SUM(ABS(t.amount)), 0), COUNT(t.id), now()
+  FROM budgets b
+  LEFT JOIN transactions t
+    ON t.user_id = b.user_id
+   AND t.type = 'expense'
+   AND t.date BETWEEN b.start_date AND b.end_date
+  WHERE b.id = p_budget_id
+  GROUP BY b.id, b.user_id
+  ON CONFLICT (budget_id) DO UPDATE
+    SET user_id = EXCLUDED.user_id,
+        spent_amount = EXCLUDED.spent_amount,
+        transaction_count = EXCLUDED.transaction_count,
+        refreshed_at = EXCLUDED.refreshed_at;
+$$ LANGUAGE sql;
+
+-- Aplica o delta de uma transação em todos os orçamentos cuja janela contém a data
+CREATE OR REPLACE FUNCTION apply_budget_snapshot_delta(
+  p_user_id UUID,
+  p_date DATE,
+  p_spent NUMERIC,
+  p_count INT
+)
+RETURNS void AS $$
+  SELECT lock_budget_snapshots(p_user_id);
+
+  UPDATE budget_snapshots s
+  SET spent_amount = s.spent_amount + p_spent,
+      transaction_count = s.transaction_count + p_count,
+      refreshed_at = now()
+  FROM budgets b
+  WHERE b.id = s.budget_id
+    AND b.user_id = p_user_id
+    AND p_date BETWEEN b.start_date AND b.end_date;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION trg_transactions_budget_snapshot()
+RETURNS trigger AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.type = 'expense' THEN
+    PERFORM apply_budget_snapshot_delta(OLD.user_id, OLD.date, -ABS(OLD.amount), -1);
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.type = 'expense' THEN
+    PERFORM apply_budget_snapshot_delta(NEW.user_id, NEW.date, ABS(NEW.amount), 1);
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER transactions_budget_snapshot
+  AFTER INSERT OR DELETE OR UPDATE OF user_id, date, amount, type ON transactions
+  FOR EACH ROW EXECUTE FUNCTION trg_transactions_budget_snapshot();
+
+CREATE OR REPLACE FUNCTION trg_budgets_snapshot()
+RETURNS trigger AS $$
+BEGIN
+  PERFORM rebuild_budget_snapshot(NEW.id);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER budgets_snapshot
+  AFTER INSERT OR UPDATE OF user_id, start_date, end_date ON budgets
+  FOR EACH ROW EXECUTE FUNCTION trg_budgets_snapshot();
+
+-- Preenche os orçamentos que já existem. O CREATE TRIGGER acima segura as escritas em
+-- transactions até o COMMIT, então nenhum delta cai entre o trigger e o snapshot inicial
+SELECT rebuild_budget_snapshot(id) FROM budgets;
+
+COMMIT;
@@ -0,0 +1,294 @@
+-- Converte a tabela transactions (heap único) para particionamento mensal por date
+-- sem parar a aplicação. Requer PostgreSQL 15+ e as funções de partição de docs/model.sql
+-- (create_transaction_partitions / detach_transaction_partitions / trg_transaction_tags_fill_date).
+--
+-- Ideia: cria a tabela particionada ao lado, espelha as escritas com trigger, copia o
+-- histórico em lotes (um mês por commit) e no final troca os nomes numa transação curta.
+-- Rodar cada etapa separadamente (psql), conferindo a saída antes de seguir.
+
+
+-- =====================================================================
+-- Etapa 1: transaction_tags passa a guardar a data da transação
+-- (FK pra tabela particionada precisa incluir a chave de partição)
+-- =====================================================================
+
+ALTER TABLE transaction_tags ADD COLUMN IF NOT EXISTS transaction_date DATE;
+
+CREATE OR REPLACE FUNCTION trg_transaction_tags_fill_date()
+RETURNS trigger AS $$
+BEGIN
+  IF NEW.transaction_date IS NULL THEN
+    SELECT t.date INTO NEW.transaction_date
+    FROM transactions t
+    WHERE t.id = NEW.transaction_id;
+  END IF;
+
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER transaction_tags_fill_date
+  BEFORE INSERT ON transaction_tags
+  FOR EACH ROW EXECUTE FUNCTION trg_transaction_tags_fill_date();
+
+-- Mantém transaction_date certo enquanto a FK antiga (só por id) ainda existe
+CREATE OR REPLACE FUNCTION trg_transactions_sync_tag_date()
+RETURNS trigger AS $$
+BEGIN
+  UPDATE transaction_tags
+  SET transaction_date = NEW.date
+  WHERE transaction_id = NEW.id;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER transactions_sync_tag_date
+  AFTER UPDATE OF date ON transactions
+  FOR EACH ROW EXECUTE FUNCTION trg_transactions_sync_tag_date();
+
+CREATE OR REPLACE PROCEDURE backfill_transaction_tag_dates(p_batch INT DEFAULT 5000)
+LANGUAGE plpgsql AS $$
+DECLARE
+  v_rows INT;
+BEGIN
+  LOOP
+    UPDATE transaction_tags tt
+    SET transaction_date = t.date
+    FROM transactions t
+    WHERE t.id = tt.transaction_id
+      AND (tt.transaction_id, tt.tag_id) IN (
+        SELECT transaction_id, tag_id
+        FROM transaction_tags
+        WHERE transaction_date IS NULL
+        LIMIT p_batch
+      );
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    COMMIT;
+    EXIT WHEN v_rows = 0;
+  END LOOP;
+END;
+$$;
+
+CALL backfill_transaction_tag_dates();
+
+-- NOT NULL validado via CHECK pra não travar a tabela durante o scan
+ALTER TABLE transaction_tags
+  ADD CONSTRAINT chk_transaction_tag_date_not_null
+  CHECK (transaction_date IS NOT NULL) NOT VALID;
+ALTER TABLE transaction_tags VALIDATE CONSTRAINT chk_transaction_tag_date_not_null;
+ALTER TABLE transaction_tags ALTER COLUMN transaction_date SET NOT NULL;
+ALTER TABLE transaction_tags DROP CONSTRAINT chk_transaction_tag_date_not_null;
+
+
+-- =====================================================================
+-- Etapa 2: tabela particionada nova, vazia
+-- =====================================================================
+
+CREATE TABLE transactions_partitioned (
+  LIKE transactions INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+
+  CONSTRAINT transactions_partitioned_pkey
+    PRIMARY KEY (id, date),
+
+  CONSTRAINT fk_transactions_user
+    FOREIGN KEY (user_id) REFERENCES users(id),
+
+  CONSTRAINT fk_transactions_account
+    FOREIGN KEY (account_id) REFERENCES accounts(id),
+
+  CONSTRAINT fk_transactions_category
+    FOREIGN KEY (category_id) REFERENCES categories(id),
+
+  CONSTRAINT fk_transactions_card
+    FOREIGN KEY (credit_card_id) REFERENCES credit_cards(id),
+
+  CONSTRAINT fk_transactions_statement
+    FOREIGN KEY (statement_id) REFERENCES credit_card_statements(id)
+) PARTITION BY RANGE (date);
+
+-- Partições do mês mais antigo até 3 meses à frente. Os nomes seguem transactions_YYYY_MM,
+-- que é o que create_transaction_partitions usa depois da troca
+DO $$
+DECLARE
+  v_start DATE;
+  v_end DATE;
+  v_name TEXT;
+BEGIN
+  SELECT date_trunc('month', COALESCE(MIN(date), CURRENT_DATE))::date
+  INTO v_start
+  FROM transactions;
+
+  WHILE v_start < date_trunc('month', CURRENT_DATE) + INTERVAL '4 months' LOOP
+    v_end := (v_start + INTERVAL '1 month')::date;
+    v_name := format('transactions_%s', to_char(v_start, 'YYYY_MM'));
+
+    EXECUTE format(
+      'CREATE TABLE %I PARTITION OF transactions_partitioned FOR VALUES FROM (%L) TO (%L)',
+      v_name, v_start, v_end
+    );
+
+    v_start := v_end;
+  END LOOP;
+END;
+$$;
+
+CREATE TABLE transactions_default PARTITION OF transactions_partitioned DEFAULT;
+
+CREATE INDEX idx_transactions_partitioned_user_date
+  ON transactions_partitioned (user_id, date);
+
+
+-- =====================================================================
+-- Etapa 3: espelha as escritas da tabela antiga na nova
+-- =====================================================================
+
+-- Upsert, não DO NOTHING: se o backfill copiou a linha e ainda não commitou, o DELETE abaixo
+-- não enxerga a cópia e o INSERT espera o backfill terminar; aí a versão nova tem que sobrescrever
+CREATE OR REPLACE FUNCTION trg_transactions_mirror()
+RETURNS trigger AS $$
+BEGIN
+  IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND (NEW.id, NEW.date) IS DISTINCT FROM (OLD.id, OLD.date)) THEN
+    DELETE FROM transactions_partitioned
+    WHERE id = OLD.id AND date = OLD.date;
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO transactions_partitioned
+    SELECT NEW.*
+    ON CONFLICT (id, date) DO UPDATE
+      SET user_id = EXCLUDED.user_id,
+          account_id = EXCLUDED.account_id,
+          category_id = EXCLUDED.category_id,
+          amount = EXCLUDED.amount,
+          description = EXCLUDED.description,
+          type = EXCLUDED.type,
+          status = EXCLUDED.status,
+          credit_card_id = EXCLUDED.credit_card_id,
+          statement_id = EXCLUDED.statement_id,
+          created_at = EXCLUDED.created_at,
+          updated_at = EXCLUDED.updated_at;
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER transactions_mirror
+  AFTER INSERT OR UPDATE OR DELETE ON transactions
+  FOR EACH ROW EXECUTE FUNCTION trg_transactions_mirror();
+
+
+-- =====================================================================
+-- Etapa 4: copia o histórico, um mês por commit
+-- =====================================================================
+
+CREATE OR REPLACE PROCEDURE backfill_transactions_partitioned(p_pause_seconds FLOAT DEFAULT 0.1)
+LANGUAGE plpgsql AS $$
+DECLARE
+  v_month DATE;
+BEGIN
+  FOR v_month IN
+    SELECT DISTINCT date_trunc('month', date)::date
+    FROM transactions
+    ORDER BY 1
+  LOOP
+    INSERT INTO transactions_partitioned
+    SELECT *
+    FROM transactions
+    WHERE date >= v_month
+      AND date < v_month + INTERVAL '1 month'
+    ON CONFLICT (id, date) DO NOTHING;
+
+    COMMIT;
+    PERFORM pg_sleep(p_pause_seconds);
+  END LOOP;
+END;
+$$;
+
+CALL backfill_transactions_partitioned();
+
+-- Remove linhas que o backfill copiou de uma versão já alterada/apagada durante a cópia
+DELETE FROM transactions_partitioned p
+WHERE NOT EXISTS (
+  SELECT 1 FROM transactions t
+  WHERE t.id = p.id AND t.date = p.date
+);
+
+-- Corrige cópias que ficaram com uma versão antiga da linha
+UPDATE transactions_partitioned p
+SET user_id = t.user_id,
+    account_id = t.account_id,
+    category_id = t.category_id,
+    amount = t.amount,
+    description = t.description,
+    type = t.type,
+    status = t.status,
+    credit_card_id = t.credit_card_id,
+    statement_id = t.statement_id,
+    created_at = t.created_at,
+    updated_at = t.updated_at
+FROM transactions t
+WHERE t.id = p.id
+  AND t.date = p.date
+  AND ROW(p.*) IS DISTINCT FROM ROW(t.*);
+
+-- Conferência linha a linha (LIKE manteve a ordem das colunas): os dois precisam dar 0
+-- antes da troca. Com a aplicação escrevendo, uma diferença pode ser só uma transação
+-- em andamento; rode de novo antes de concluir que algo ficou pra trás
+SELECT
+  (SELECT COUNT(*) FROM (SELECT * FROM transactions EXCEPT ALL SELECT * FROM transactions_partitioned) d) AS missing_or_stale,
+  (SELECT COUNT(*) FROM (SELECT * FROM transactions_partitioned EXCEPT ALL SELECT * FROM transactions) d) AS extra;
+
+ANALYZE transactions_partitioned;
+
+
+-- =====================================================================
+-- Etapa 5: troca (transação curta, a tabela fica bloqueada só durante os renames)
+-- =====================================================================
+
+BEGIN;
+
+SET LOCAL lock_timeout = '5s';
+LOCK TABLE transactions IN ACCESS EXCLUSIVE MODE;
+
+ALTER TABLE transaction_tags DROP CONSTRAINT fk_transaction_tag_transaction;
+
+DROP TRIGGER transactions_mirror ON transactions;
+DROP TRIGGER transactions_sync_tag_date ON transactions;
+DROP TRIGGER IF EXISTS transactions_budget_snapshot ON transactions;
+
+ALTER TABLE transactions RENAME TO transactions_legacy;
+ALTER INDEX transactions_pkey RENAME TO transactions_legacy_pkey;
+ALTER INDEX IF EXISTS idx_transactions_user_date RENAME TO idx_transactions_legacy_user_date;
+
+ALTER TABLE transactions_partitioned RENAME TO transactions;
+ALTER INDEX transactions_partitioned_pkey RENAME TO transactions_pkey;
+ALTER INDEX idx_transactions_partitioned_user_date RENAME TO idx_transactions_user_date;
+
+CREATE TRIGGER transactions_budget_snapshot
+  AFTER INSERT OR DELETE OR UPDATE OF user_id, date, amount, type ON transactions
+  FOR EACH ROW EXECUTE FUNCTION trg_transactions_budget_snapshot();
+
+ALTER TABLE transaction_tags
+  ADD CONSTRAINT fk_transaction_tag_transaction
+  FOREIGN KEY (transaction_id, transaction_date)
+  REFERENCES transactions(id, date) ON DELETE CASCADE ON UPDATE CASCADE
+  NOT VALID;
+
+COMMIT;
+
+ALTER TABLE transaction_tags VALIDATE CONSTRAINT fk_transaction_tag_transaction;
+
+
+-- =====================================================================
+-- Etapa 6: limpeza (depois de conferir a aplicação rodando na tabela nova)
+-- =====================================================================
+
+DROP FUNCTION trg_transactions_mirror();
+DROP FUNCTION trg_transactions_sync_tag_date();
+DROP PROCEDURE backfill_transactions_partitioned(FLOAT);
+DROP PROCEDURE backfill_transaction_tag_dates(INT);
+
+-- DROP TABLE transactions_legacy;
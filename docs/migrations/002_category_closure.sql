@@ -0,0 +1,97 @@
+-- Cria a closure table de categorias e preenche a partir de parent_category_id.
+-- As funções/triggers são as mesmas de docs/model.sql.
+
+CREATE TABLE category_closure (
+  ancestor_id UUID NOT NULL,
+  descendant_id UUID NOT NULL,
+  user_id UUID NOT NULL,
+  depth INT NOT NULL,
+
+  PRIMARY KEY (ancestor_id, descendant_id),
+
+  CONSTRAINT fk_category_closure_ancestor
+    FOREIGN KEY (ancestor_id) REFERENCES categories(id) ON DELETE CASCADE,
+
+  CONSTRAINT fk_category_closure_descendant
+    FOREIGN KEY (descendant_id) REFERENCES categories(id) ON DELETE CASCADE,
+
+  CONSTRAINT fk_category_closure_user
+    FOREIGN KEY (user_id) REFERENCES users(id)
+);
+
+CREATE INDEX idx_category_closure_descendant ON category_closure (descendant_id, depth);
+-- Em tabela com muito dado, prefira CREATE INDEX CONCURRENTLY em cada partição
+CREATE INDEX idx_transactions_user_category_date ON transactions (user_id, category_id, date);
+
+CREATE OR REPLACE FUNCTION trg_categories_closure_insert()
+RETURNS trigger AS $$
+BEGIN
+  INSERT INTO category_closure (ancestor_id, descendant_id, user_id, depth)
+  VALUES (NEW.id, NEW.id, NEW.user_id, 0);
+
+  INSERT INTO category_closure (ancestor_id, descendant_id, user_id, depth)
+  SELECT c.ancestor_id, NEW.id, NEW.user_id, c.depth + 1
+  FROM category_closure c
+  WHERE c.descendant_id = NEW.parent_category_id;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER categories_closure_insert
+  AFTER INSERT ON categories
+  FOR EACH ROW EXECUTE FUNCTION trg_categories_closure_insert();
+
+-- Move a subárvore inteira: desliga dos ancestrais antigos e liga nos novos
+CREATE OR REPLACE FUNCTION trg_categories_closure_move()
+RETURNS trigger AS $$
+BEGIN
+  IF NEW.parent_category_id IS NOT NULL AND EXISTS (
+    SELECT 1 FROM category_closure
+    WHERE ancestor_id = NEW.id AND descendant_id = NEW.parent_category_id
+  ) THEN
+    RAISE EXCEPTION 'category % cannot be moved under its own descendant %', NEW.id, NEW.parent_category_id;
+  END IF;
+
+  DELETE FROM category_closure link
+  USING category_closure sub, category_closure sup
+  WHERE sub.ancestor_id = NEW.id
+    AND sup.descendant_id = NEW.id
+    AND sup.depth > 0
+    AND link.ancestor_id = sup.ancestor_id
+    AND link.descendant_id = sub.descendant_id;
+
+  INSERT INTO category_closure (ancestor_id, descendant_id, user_id, depth)
+  SELECT sup.ancestor_id, sub.descendant_id, NEW.user_id, sup.depth + sub.depth + 1
+  FROM category_closure sup
+  CROSS JOIN category_closure sub
+  WHERE sup.descendant_id = NEW.parent_category_id
+    AND sub.ancestor_id = NEW.id;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER categories_closure_move
+  AFTER UPDATE OF parent_category_id ON categories
+  FOR EACH ROW
+  WHEN (OLD.parent_category_id IS DISTINCT FROM NEW.parent_category_id)
+  EXECUTE FUNCTION trg_categories_closure_move();
+
+-- Backfill das árvores existentes
+INSERT INTO category_closure (ancestor_id, descendant_id, user_id, depth)
+WITH RECURSIVE tree AS (
+  SELECT id AS ancestor_id, id AS descendant_id, user_id, 0 AS depth
+  FROM categories
+
+  UNION ALL
+
+  SELECT t.ancestor_id, c.id, c.user_id, t.depth + 1
+  FROM tree t
+  JOIN categories c ON c.parent_category_id = t.descendant_id
+)
+SELECT ancestor_id, descendant_id, user_id, depth
+FROM tree
+ON CONFLICT (ancestor_id, descendant_id) DO NOTHING;
+
+ANALYZE category_closure;
@@ -0,0 +1,54 @@
+-- Busca em transactions.description: coluna tsvector gerada (português + inglês)
+-- e índice trigram. Rodar no psql (usa \gexec).
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+-- Coluna gerada STORED reescreve todas as partições com lock exclusivo:
+-- rodar em janela de manutenção
+ALTER TABLE transactions
+  ADD COLUMN search_vector TSVECTOR GENERATED ALWAYS AS (
+    to_tsvector('portuguese', COALESCE(description, '')) ||
+    to_tsvector('english', COALESCE(description, ''))
+  ) STORED;
+
+-- Índices criados só no pai (inválidos) e depois CONCURRENTLY em cada partição,
+-- pra não bloquear escrita enquanto os GIN são construídos
+
+CREATE INDEX idx_transactions_search_vector
+  ON ONLY transactions USING gin (user_id, search_vector);
+
+CREATE INDEX idx_transactions_description_trgm
+  ON ONLY transactions USING gin (user_id, description gin_trgm_ops);
+
+SELECT format(
+  'CREATE INDEX CONCURRENTLY IF NOT EXISTS %I ON %I USING gin (user_id, search_vector)',
+  c.relname || '_search_vector_idx', c.relname
+)
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = 'transactions'::regclass
+\gexec
+
+SELECT format(
+  'CREATE INDEX CONCURRENTLY IF NOT EXISTS %I ON %I USING gin (user_id, description gin_trgm_ops)',
+  c.relname || '_description_trgm_idx', c.relname
+)
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = 'transactions'::regclass
+\gexec
+
+SELECT format('ALTER INDEX idx_transactions_search_vector ATTACH PARTITION %I', c.relname || '_search_vector_idx')
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = 'transactions'::regclass
+\gexec
+
+SELECT format('ALTER INDEX idx_transactions_description_trgm ATTACH PARTITION %I', c.relname || '_description_trgm_idx')
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = 'transactions'::regclass
+\gexec
+
+ANALYZE transactions;
@@ -0,0 +1,13 @@
+-- Soft delete de usuários: DELETE /users/{id} só marca status = 'deleted' e o
+-- purge em segundo plano (database/user_purge.py) apaga os dados em lotes.
+
+ALTER TABLE users
+  ADD COLUMN status TEXT NOT NULL DEFAULT 'active',
+  ADD COLUMN deleted_at TIMESTAMPTZ,
+  ADD CONSTRAINT chk_user_status CHECK (status IN ('active', 'deleted'));
+
+-- O email passa a ser único só entre usuários ativos
+CREATE UNIQUE INDEX CONCURRENTLY uq_users_email_active ON users (email) WHERE status = 'active';
+ALTER TABLE users DROP CONSTRAINT users_email_key;
+
+CREATE INDEX CONCURRENTLY idx_users_deleted ON users (deleted_at) WHERE status = 'deleted';
@@ -0,0 +1,125 @@
+-- Versão nova de create_transaction_partitions (move as linhas que já estavam na
+-- transactions_default pra partição criada) e de detach_transaction_partitions (arquiva as
+-- tags do mês antes do DETACH). Mesmas definições de docs/model.sql.
+
+-- Cria as partições dos p_months meses a partir de p_from. Idempotente, a aplicação
+-- chama periodicamente (database/partitions.py) pra manter os meses futuros criados.
+-- Se transactions_default já tiver linhas do mês (ex.: parcela lançada com data bem à frente),
+-- elas saem da default, a partição é criada e as linhas (com as tags) voltam pra ela
+CREATE OR REPLACE FUNCTION create_transaction_partitions(p_from DATE, p_months INT)
+RETURNS INT AS $$
+DECLARE
+  v_start DATE := date_trunc('month', p_from)::date;
+  v_end DATE;
+  v_name TEXT;
+  v_columns TEXT;
+  v_created INT := 0;
+BEGIN
+  PERFORM pg_advisory_xact_lock(hashtext('transactions_partitions'));
+
+  -- Colunas graváveis (search_vector é gerada)
+  SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum)
+  INTO v_columns
+  FROM pg_attribute
+  WHERE attrelid = 'transactions'::regclass
+    AND attnum > 0
+    AND NOT attisdropped
+    AND attgenerated = '';
+
+  FOR i IN 1..p_months LOOP
+    v_end := (v_start + INTERVAL '1 month')::date;
+    v_name := format('transactions_%s', to_char(v_start, 'YYYY_MM'));
+
+    IF to_regclass(v_name) IS NULL THEN
+      IF EXISTS (
+        SELECT 1 FROM transactions_default
+        WHERE date >= v_start AND date < v_end
+      ) THEN
+        CREATE TEMP TABLE transactions_moving AS
+          SELECT * FROM transactions_default
+          WHERE date >= v_start AND date < v_end;
+
+        CREATE TEMP TABLE transaction_tags_moving AS
+          SELECT tt.*
+          FROM transaction_tags tt
+          WHERE tt.transaction_date >= v_start AND tt.transaction_date < v_end;
+
+        -- Apaga as tags em cascata; os triggers de budget_snapshots desfazem e refazem o delta
+        DELETE FROM transactions_default
+        WHERE date >= v_start AND date < v_end;
+
+        EXECUTE format(
+          'CREATE TABLE %I PARTITION OF transactions FOR VALUES FROM (%L) TO (%L)',
+          v_name, v_start, v_end
+        );
+
+        EXECUTE format(
+          'INSERT INTO transactions (%s) SELECT %s FROM pg_temp.transactions_moving',
+          v_columns, v_columns
+        );
+        INSERT INTO transaction_tags SELECT * FROM pg_temp.transaction_tags_moving;
+
+        DROP TABLE pg_temp.transactions_moving;
+        DROP TABLE pg_temp.transaction_tags_moving;
+      ELSE
+        EXECUTE format(
+          'CREATE TABLE %I PARTITION OF transactions FOR VALUES FROM (%L) TO (%L)',
+          v_name, v_start, v_end
+        );
+      END IF;
+
+      v_created := v_created + 1;
+    END IF;
+
+    v_start := v_end;
+  END LOOP;
+
+  RETURN v_created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Desanexa (sem apagar) as partições que terminam antes de p_before. As tabelas
+-- desanexadas ficam disponíveis pra arquivar ou dropar manualmente.
+-- transaction_tags tem FK pra transactions e o DETACH falha com linhas referenciando a
+-- partição: as tags do mês vão pra <partição>_tags, arquivada junto, e saem de transaction_tags
+CREATE OR REPLACE FUNCTION detach_transaction_partitions(p_before DATE)
+RETURNS INT AS $$
+DECLARE
+  v_name TEXT;
+  v_start DATE;
+  v_detached INT := 0;
+BEGIN
+  PERFORM pg_advisory_xact_lock(hashtext('transactions_partitions'));
+
+  FOR v_name IN
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'transactions'::regclass
+      AND c.relname ~ '^transactions_[0-9]{4}_[0-9]{2}$'
+      AND to_date(substr(c.relname, 14), 'YYYY_MM') + INTERVAL '1 month' <= p_before
+    ORDER BY c.relname
+  LOOP
+    v_start := to_date(substr(v_name, 14), 'YYYY_MM');
+
+    EXECUTE format(
+      'CREATE TABLE IF NOT EXISTS %I (LIKE transaction_tags)',
+      v_name || '_tags'
+    );
+    EXECUTE format(
+      'WITH archived AS (
+         DELETE FROM transaction_tags
+         WHERE transaction_date >= %L AND transaction_date < %L
+         RETURNING *
+       )
+       INSERT INTO %I SELECT * FROM archived',
+      v_start, (v_start + INTERVAL '1 month')::date, v_name || '_tags'
+    );
+
+    EXECUTE format('ALTER TABLE transactions DETACH PARTITION %I', v_name);
+    v_detached := v_detached + 1;
+  END LOOP;
+
+  RETURN v_detached;
+END;
+$$ LANGUAGE plpgsql;
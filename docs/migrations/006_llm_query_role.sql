@@ -0,0 +1,66 @@
+-- Isolamento por usuário das consultas geradas pela LLM: role contaai_llm + RLS.
+-- Mesmo bloco do fim de docs/model.sql.
+
+-- O backend grava o usuário em app.user_id e troca pra contaai_llm (SET LOCAL ROLE) dentro de
+-- uma transação READ ONLY. As políticas limitam cada tabela às linhas desse usuário, então o
+-- isolamento entre usuários fica no banco e não no validador de texto. users e as partições
+-- não têm GRANT: ler transactions_2024_01 direto não passaria pela política da tabela pai.
+-- Precisa de superusuário (REVOKE em set_config). Se a aplicação conectar com um role que não
+-- é o dono das tabelas, dê a ele os mesmos GRANTs feitos pro dono no bloco abaixo.
+
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'contaai_llm') THEN
+    CREATE ROLE contaai_llm NOLOGIN;
+  END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION app_user_id()
+RETURNS UUID AS $$
+  SELECT NULLIF(current_setting('app.user_id', true), '')::uuid;
+$$ LANGUAGE sql STABLE;
+
+DO $$
+DECLARE
+  v_owner TEXT := (SELECT relowner::regrole::text FROM pg_class WHERE oid = 'transactions'::regclass);
+  v_table TEXT;
+BEGIN
+  -- A aplicação troca pro role e é a única que chama set_config: com ele o SQL gerado poderia
+  -- trocar app.user_id ou voltar pro role da sessão (set_config('role', ...))
+  EXECUTE format('GRANT contaai_llm TO %s', v_owner);
+  REVOKE EXECUTE ON FUNCTION set_config(text, text, boolean) FROM PUBLIC;
+  EXECUTE format('GRANT EXECUTE ON FUNCTION set_config(text, text, boolean) TO %s', v_owner);
+
+  GRANT USAGE ON SCHEMA public TO contaai_llm;
+  GRANT SELECT ON account_types, transaction_tags TO contaai_llm;
+
+  FOREACH v_table IN ARRAY ARRAY[
+    'accounts', 'categories', 'category_closure', 'tags', 'credit_cards',
+    'credit_card_statements', 'transactions', 'scheduled_transactions', 'budgets', 'budget_snapshots'
+  ] LOOP
+    EXECUTE format('GRANT SELECT ON %I TO contaai_llm', v_table);
+    EXECUTE format('ALTER TABLE %I ENABLE ROW LEVEL SECURITY', v_table);
+
+    -- Os outros roles continuam vendo tudo (permissiva); a restritiva só vale pro contaai_llm
+    EXECUTE format('DROP POLICY IF EXISTS all_rows ON %I', v_table);
+    EXECUTE format('CREATE POLICY all_rows ON %I USING (true) WITH CHECK (true)', v_table);
+    EXECUTE format('DROP POLICY IF EXISTS llm_current_user ON %I', v_table);
+    EXECUTE format(
+      'CREATE POLICY llm_current_user ON %I AS RESTRICTIVE FOR SELECT TO contaai_llm '
+      'USING (user_id = app_user_id())',
+      v_table
+    );
+  END LOOP;
+END;
+$$;
+
+-- transaction_tags não tem user_id: vale pela tag
+ALTER TABLE transaction_tags ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS all_rows ON transaction_tags;
+CREATE POLICY all_rows ON transaction_tags USING (true) WITH CHECK (true);
+
+DROP POLICY IF EXISTS llm_current_user ON transaction_tags;
+CREATE POLICY llm_current_user ON transaction_tags AS RESTRICTIVE FOR SELECT TO contaai_llm
+  USING (EXISTS (SELECT 1 FROM tags t WHERE t.id = tag_id AND t.user_id = app_user_id()));
@@ -2,19 +2,32 @@
 -- Primeiro esse
 
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS btree_gin;
 
 -- Depois cria as tabelas
 
 CREATE TABLE users (
   id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
   name TEXT NOT NULL,
-  email TEXT NOT NULL UNIQUE,
+  email TEXT NOT NULL,
   password_hash TEXT NOT NULL,
   timezone TEXT DEFAULT 'America/Sao_Paulo',
+  status TEXT NOT NULL DEFAULT 'active',
+  deleted_at TIMESTAMPTZ,
   created_at TIMESTAMPTZ DEFAULT now(),
-  updated_at TIMESTAMPTZ DEFAULT now()
+  updated_at TIMESTAMPTZ DEFAULT now(),
+
+  CONSTRAINT chk_user_status
+    CHECK (status IN ('active', 'deleted'))
 );
 
+-- Email único só entre usuários ativos: quem foi excluído libera o email na hora,
+-- mesmo antes do purge apagar a linha
+CREATE UNIQUE INDEX uq_users_email_active ON users (email) WHERE status = 'active';
+-- Fila do purge de usuários excluídos (database/user_purge.py)
+CREATE INDEX idx_users_deleted ON users (deleted_at) WHERE status = 'deleted';
+
 CREATE TABLE account_types (
   id SERIAL PRIMARY KEY,
   key TEXT NOT NULL UNIQUE,
@@ -119,8 +132,9 @@ CREATE TABLE credit_card_statements (
     CHECK (status IN ('open', 'closed', 'paid', 'partial'))
 );
 
+-- Particionada por mês em date (PostgreSQL 15+). A PK precisa conter a chave de partição
 CREATE TABLE transactions (
-  id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+  id UUID NOT NULL DEFAULT uuid_generate_v4(),
   user_id UUID NOT NULL,
   account_id UUID,
   category_id UUID,
@@ -133,6 +147,13 @@ CREATE TABLE transactions (
   statement_id UUID,
   created_at TIMESTAMPTZ DEFAULT now(),
   updated_at TIMESTAMPTZ DEFAULT now(),
+  search_vector TSVECTOR GENERATED ALWAYS AS (
+    to_tsvector('portuguese', COALESCE(description, '')) ||
+    to_tsvector('english', COALESCE(description, ''))
+  ) STORED,
+
+  CONSTRAINT transactions_pkey
+    PRIMARY KEY (id, date),
 
   CONSTRAINT fk_transactions_user
     FOREIGN KEY (user_id) REFERENCES users(id),
@@ -154,7 +175,10 @@ CREATE TABLE transactions (
 
   CONSTRAINT chk_transaction_status
     CHECK (status IN ('pending', 'posted', 'reconciled'))
-);
+) PARTITION BY RANGE (date);
+
+-- Só recebe datas fora das partições mensais (ex: lançamentos muito antigos ou digitados errado)
+CREATE TABLE transactions_default PARTITION OF transactions DEFAULT;
 
 CREATE TABLE scheduled_transactions (
   id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -202,14 +226,413 @@ CREATE TABLE budgets (
 
 CREATE TABLE transaction_tags (
   transaction_id UUID NOT NULL,
+  transaction_date DATE NOT NULL,
   tag_id UUID NOT NULL,
 
   PRIMARY KEY (transaction_id, tag_id),
 
   CONSTRAINT fk_transaction_tag_transaction
-    FOREIGN KEY (transaction_id) REFERENCES transactions(id) ON DELETE CASCADE,
+    FOREIGN KEY (transaction_id, transaction_date)
+    REFERENCES transactions(id, date) ON DELETE CASCADE ON UPDATE CASCADE,
 
   CONSTRAINT fk_transaction_tag_tag
     FOREIGN KEY (tag_id) REFERENCES tags(id) ON DELETE CASCADE
 );
 
+-- Quem insere tag não precisa saber a data da transação
+CREATE OR REPLACE FUNCTION trg_transaction_tags_fill_date()
+RETURNS trigger AS $$
+BEGIN
+  IF NEW.transaction_date IS NULL THEN
+    SELECT t.date INTO NEW.transaction_date
+    FROM transactions t
+    WHERE t.id = NEW.transaction_id;
+  END IF;
+
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER transaction_tags_fill_date
+  BEFORE INSERT ON transaction_tags
+  FOR EACH ROW EXECUTE FUNCTION trg_transaction_tags_fill_date();
+
+-- Partições mensais de transactions (transactions_YYYY_MM)
+
+-- Cria as partições dos p_months meses a partir de p_from. Idempotente, a aplicação
+-- chama periodicamente (database/partitions.py) pra manter os meses futuros criados.
+-- Se transactions_default já tiver linhas do mês (ex.: parcela lançada com data bem à frente),
+-- elas saem da default, a partição é criada e as linhas (com as tags) voltam pra ela
+CREATE OR REPLACE FUNCTION create_transaction_partitions(p_from DATE, p_months INT)
+RETURNS INT AS $$
+DECLARE
+  v_start DATE := date_trunc('month', p_from)::date;
+  v_end DATE;
+  v_name TEXT;
+  v_columns TEXT;
+  v_created INT := 0;
+BEGIN
+  PERFORM pg_advisory_xact_lock(hashtext('transactions_partitions'));
+
+  -- Colunas graváveis (search_vector é gerada)
+  SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum)
+  INTO v_columns
+  FROM pg_attribute
+  WHERE attrelid = 'transactions'::regclass
+    AND attnum > 0
+    AND NOT attisdropped
+    AND attgenerated = '';
+
+  FOR i IN 1..p_months LOOP
+    v_end := (v_start + INTERVAL '1 month')::date;
+    v_name := format('transactions_%s', to_char(v_start, 'YYYY_MM'));
+
+    IF to_regclass(v_name) IS NULL THEN
+      IF EXISTS (
+        SELECT 1 FROM transactions_default
+        WHERE date >= v_start AND date < v_end
+      ) THEN
+        CREATE TEMP TABLE transactions_moving AS
+          SELECT * FROM transactions_default
+          WHERE date >= v_start AND date < v_end;
+
+        CREATE TEMP TABLE transaction_tags_moving AS
+          SELECT tt.*
+          FROM transaction_tags tt
+          WHERE tt.transaction_date >= v_start AND tt.transaction_date < v_end;
+
+        -- Apaga as tags em cascata; os triggers de budget_snapshots desfazem e refazem o delta
+        DELETE FROM transactions_default
+        WHERE date >= v_start AND date < v_end;
+
+        EXECUTE format(
+          'CREATE TABLE %I PARTITION OF transactions FOR VALUES FROM (%L) TO (%L)',
+          v_name, v_start, v_end
+        );
+
+        EXECUTE format(
+          'INSERT INTO transactions (%s) SELECT %s FROM pg_temp.transactions_moving',
+          v_columns, v_columns
+        );
+        INSERT INTO transaction_tags SELECT * FROM pg_temp.transaction_tags_moving;
+
+        DROP TABLE pg_temp.transactions_moving;
+        DROP TABLE pg_temp.transaction_tags_moving;
+      ELSE
+        EXECUTE format(
+          'CREATE TABLE %I PARTITION OF transactions FOR VALUES FROM (%L) TO (%L)',
+          v_name, v_start, v_end
+        );
+      END IF;
+
+      v_created := v_created + 1;
+    END IF;
+
+    v_start := v_end;
+  END LOOP;
+
+  RETURN v_created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Desanexa (sem apagar) as partições que terminam antes de p_before. As tabelas
+-- desanexadas ficam disponíveis pra arquivar ou dropar manualmente.
+-- transaction_tags tem FK pra transactions e o DETACH falha com linhas referenciando a
+-- partição: as tags do mês vão pra <partição>_tags, arquivada junto, e saem de transaction_tags
+CREATE OR REPLACE FUNCTION detach_transaction_partitions(p_before DATE)
+RETURNS INT AS $$
+DECLARE
+  v_name TEXT;
+  v_start DATE;
+  v_detached INT := 0;
+BEGIN
+  PERFORM pg_advisory_xact_lock(hashtext('transactions_partitions'));
+
+  FOR v_name IN
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'transactions'::regclass
+      AND c.relname ~ '^transactions_[0-9]{4}_[0-9]{2}$'
+      AND to_date(substr(c.relname, 14), 'YYYY_MM') + INTERVAL '1 month' <= p_before
+    ORDER BY c.relname
+  LOOP
+    v_start := to_date(substr(v_name, 14), 'YYYY_MM');
+
+    EXECUTE format(
+      'CREATE TABLE IF NOT EXISTS %I (LIKE transaction_tags)',
+      v_name || '_tags'
+    );
+    EXECUTE format(
+      'WITH archived AS (
+         DELETE FROM transaction_tags
+         WHERE transaction_date >= %L AND transaction_date < %L
+         RETURNING *
+       )
+       INSERT INTO %I SELECT * FROM archived',
+      v_start, (v_start + INTERVAL '1 month')::date, v_name || '_tags'
+    );
+
+    EXECUTE format('ALTER TABLE transactions DETACH PARTITION %I', v_name);
+    v_detached := v_detached + 1;
+  END LOOP;
+
+  RETURN v_detached;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Partições iniciais: mês atual e os próximos
+SELECT create_transaction_partitions(CURRENT_DATE, 4);
+
+-- Índices
+
+CREATE INDEX idx_transactions_user_date ON transactions (user_id, date);
+
+-- Busca por descrição: palavras (tsvector) e trechos/erros de digitação (trigram).
+-- user_id entra no GIN (btree_gin) pra busca não depender do tamanho do histórico dos outros usuários
+CREATE INDEX idx_transactions_search_vector ON transactions USING gin (user_id, search_vector);
+CREATE INDEX idx_transactions_description_trgm ON transactions USING gin (user_id, description gin_trgm_ops);
+CREATE INDEX idx_budgets_user_period ON budgets (user_id, end_date, start_date);
+
+-- Snapshot de consumo dos orçamentos (mantido por trigger)
+
+CREATE TABLE budget_snapshots (
+  budget_id UUID PRIMARY KEY,
+  user_id UUID NOT NULL,
+  spent_amount NUMERIC(18,2) NOT NULL DEFAULT 0,
+  transaction_count INT NOT NULL DEFAULT 0,
+  refreshed_at TIMESTAMPTZ DEFAULT now(),
+
+  CONSTRAINT fk_budget_snapshot_budget
+    FOREIGN KEY (budget_id) REFERENCES budgets(id) ON DELETE CASCADE,
+
+  CONSTRAINT fk_budget_snapshot_user
+    FOREIGN KEY (user_id) REFERENCES users(id)
+);
+
+-- Rebuild e delta do mesmo usuário se serializam por esse lock (até o COMMIT). Sem ele um
+-- orçamento criado junto com uma despesa na janela perde a despesa: o delta não vê o snapshot
+-- ainda não commitado e o rebuild não vê a transação. Com o lock, o segundo comando da função
+-- roda com um snapshot novo, depois do COMMIT do outro, e enxerga a linha dele
+CREATE OR REPLACE FUNCTION lock_budget_snapshots(p_user_id UUID)
+RETURNS void AS $$
+  SELECT pg_advisory_xact_lock(hashtext('budget_snapshots'), hashtext(p_user_id::text));
+$$ LANGUAGE sql;
+
+-- Recalcula do zero o snapshot de um orçamento (criação ou mudança de período)
+CREATE OR REPLACE FUNCTION rebuild_budget_snapshot(p_budget_id UUID)
+RETURNS void AS $$
+  SELECT lock_budget_snapshots(user_id) FROM budgets WHERE id = p_budget_id;
+
+  INSERT INTO budget_snapshots (budget_id, user_id, spent_amount, transaction_count, refreshed_at)
+  SELECT b.id, b.user_id, COALESCE(SUM(ABS(t.amount)), 0), COUNT(t.id), now()
+  FROM budgets b
+  LEFT JOIN transactions t
+    ON t.user_id = b.user_id
+   AND t.type = 'expense'
+   AND t.date BETWEEN b.start_date AND b.end_date
+  WHERE b.id = p_budget_id
+  GROUP BY b.id, b.user_id
+  ON CONFLICT (budget_id) DO UPDATE
+    SET user_id = EXCLUDED.user_id,
+        spent_amount = EXCLUDED.spent_amount,
+        transaction_count = EXCLUDED.transaction_count,
+        refreshed_at = EXCLUDED.refreshed_at;
+$$ LANGUAGE sql;
+
+-- Aplica o delta de uma transação em todos os orçamentos cuja janela contém a data
+CREATE OR REPLACE FUNCTION apply_budget_snapshot_delta(
+  p_user_id UUID,
+  p_date DATE,
+  p_spent NUMERIC,
+  p_count INT
+)
+RETURNS void AS $$
+  SELECT lock_budget_snapshots(p_user_id);
+
+  UPDATE budget_snapshots s
+  SET spent_amount = s.spent_amount + p_spent,
+      transaction_count = s.transaction_count + p_count,
+      refreshed_at = now()
+  FROM budgets b
+  WHERE b.id = s.budget_id
+    AND b.user_id = p_user_id
+    AND p_date BETWEEN b.start_date AND b.end_date;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION trg_transactions_budget_snapshot()
+RETURNS trigger AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.type = 'expense' THEN
+    PERFORM apply_budget_snapshot_delta(OLD.user_id, OLD.date, -ABS(OLD.amount), -1);
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.type = 'expense' THEN
+    PERFORM apply_budget_snapshot_delta(NEW.user_id, NEW.date, ABS(NEW.amount), 1);
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER transactions_budget_snapshot
+  AFTER INSERT OR DELETE OR UPDATE OF user_id, date, amount, type ON transactions
+  FOR EACH ROW EXECUTE FUNCTION trg_transactions_budget_snapshot();
+
+CREATE OR REPLACE FUNCTION trg_budgets_snapshot()
+RETURNS trigger AS $$
+BEGIN
+  PERFORM rebuild_budget_snapshot(NEW.id);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER budgets_snapshot
+  AFTER INSERT OR UPDATE OF user_id, start_date, end_date ON budgets
+  FOR EACH ROW EXECUTE FUNCTION trg_budgets_snapshot();
+
+-- Hierarquia de categorias (closure table, mantida por trigger)
+
+CREATE TABLE category_closure (
+  ancestor_id UUID NOT NULL,
+  descendant_id UUID NOT NULL,
+  user_id UUID NOT NULL,
+  depth INT NOT NULL,
+
+  PRIMARY KEY (ancestor_id, descendant_id),
+
+  CONSTRAINT fk_category_closure_ancestor
+    FOREIGN KEY (ancestor_id) REFERENCES categories(id) ON DELETE CASCADE,
+
+  CONSTRAINT fk_category_closure_descendant
+    FOREIGN KEY (descendant_id) REFERENCES categories(id) ON DELETE CASCADE,
+
+  CONSTRAINT fk_category_closure_user
+    FOREIGN KEY (user_id) REFERENCES users(id)
+);
+
+CREATE INDEX idx_category_closure_descendant ON category_closure (descendant_id, depth);
+CREATE INDEX idx_transactions_user_category_date ON transactions (user_id, category_id, date);
+
+CREATE OR REPLACE FUNCTION trg_categories_closure_insert()
+RETURNS trigger AS $$
+BEGIN
+  INSERT INTO category_closure (ancestor_id, descendant_id, user_id, depth)
+  VALUES (NEW.id, NEW.id, NEW.user_id, 0);
+
+  INSERT INTO category_closure (ancestor_id, descendant_id, user_id, depth)
+  SELECT c.ancestor_id, NEW.id, NEW.user_id, c.depth + 1
+  FROM category_closure c
+  WHERE c.descendant_id = NEW.parent_category_id;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER categories_closure_insert
+  AFTER INSERT ON categories
+  FOR EACH ROW EXECUTE FUNCTION trg_categories_closure_insert();
+
+-- Move a subárvore inteira: desliga dos ancestrais antigos e liga nos novos
+CREATE OR REPLACE FUNCTION trg_categories_closure_move()
+RETURNS trigger AS $$
+BEGIN
+  IF NEW.parent_category_id IS NOT NULL AND EXISTS (
+    SELECT 1 FROM category_closure
+    WHERE ancestor_id = NEW.id AND descendant_id = NEW.parent_category_id
+  ) THEN
+    RAISE EXCEPTION 'category % cannot be moved under its own descendant %', NEW.id, NEW.parent_category_id;
+  END IF;
+
+  DELETE FROM category_closure link
+  USING category_closure sub, category_closure sup
+  WHERE sub.ancestor_id = NEW.id
+    AND sup.descendant_id = NEW.id
+    AND sup.depth > 0
+    AND link.ancestor_id = sup.ancestor_id
+    AND link.descendant_id = sub.descendant_id;
+
+  INSERT INTO category_closure (ancestor_id, descendant_id, user_id, depth)
+  SELECT sup.ancestor_id, sub.descendant_id, NEW.user_id, sup.depth + sub.depth + 1
+  FROM category_closure sup
+  CROSS JOIN category_closure sub
+  WHERE sup.descendant_id = NEW.parent_category_id
+    AND sub.ancestor_id = NEW.id;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER categories_closure_move
+  AFTER UPDATE OF parent_category_id ON categories
+  FOR EACH ROW
+  WHEN (OLD.parent_category_id IS DISTINCT FROM NEW.parent_category_id)
+  EXECUTE FUNCTION trg_categories_closure_move();
+
+
+-- =====================================================================
+-- Role das consultas geradas pela LLM (/chat/query e /chat/plan)
+-- =====================================================================
+-- O backend grava o usuário em app.user_id e troca pra contaai_llm (SET LOCAL ROLE) dentro de
+-- uma transação READ ONLY. As políticas limitam cada tabela às linhas desse usuário, então o
+-- isolamento entre usuários fica no banco e não no validador de texto. users e as partições
+-- não têm GRANT: ler transactions_2024_01 direto não passaria pela política da tabela pai.
+-- Precisa de superusuário (REVOKE em set_config). Se a aplicação conectar com um role que não
+-- é o dono das tabelas, dê a ele os mesmos GRANTs feitos pro dono no bloco abaixo.
+
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'contaai_llm') THEN
+    CREATE ROLE contaai_llm NOLOGIN;
+  END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION app_user_id()
+RETURNS UUID AS $$
+  SELECT NULLIF(current_setting('app.user_id', true), '')::uuid;
+$$ LANGUAGE sql STABLE;
+
+DO $$
+DECLARE
+  v_owner TEXT := (SELECT relowner::regrole::text FROM pg_class WHERE oid = 'transactions'::regclass);
+  v_table TEXT;
+BEGIN
+  -- A aplicação troca pro role e é a única que chama set_config: com ele o SQL gerado poderia
+  -- trocar app.user_id ou voltar pro role da sessão (set_config('role', ...))
+  EXECUTE format('GRANT contaai_llm TO %s', v_owner);
+  REVOKE EXECUTE ON FUNCTION set_config(text, text, boolean) FROM PUBLIC;
+  EXECUTE format('GRANT EXECUTE ON FUNCTION set_config(text, text, boolean) TO %s', v_owner);
+
+  GRANT USAGE ON SCHEMA public TO contaai_llm;
+  GRANT SELECT ON account_types, transaction_tags TO contaai_llm;
+
+  FOREACH v_table IN ARRAY ARRAY[
+    'accounts', 'categories', 'category_closure', 'tags', 'credit_cards',
+    'credit_card_statements', 'transactions', 'scheduled_transactions', 'budgets', 'budget_snapshots'
+  ] LOOP
+    EXECUTE format('GRANT SELECT ON %I TO contaai_llm', v_table);
+    EXECUTE format('ALTER TABLE %I ENABLE ROW LEVEL SECURITY', v_table);
+
+    -- Os outros roles continuam vendo tudo (permissiva); a restritiva só vale pro contaai_llm
+    EXECUTE format('DROP POLICY IF EXISTS all_rows ON %I', v_table);
+    EXECUTE format('CREATE POLICY all_rows ON %I USING (true) WITH CHECK (true)', v_table);
+    EXECUTE format('DROP POLICY IF EXISTS llm_current_user ON %I', v_table);
+    EXECUTE format(
+      'CREATE POLICY llm_current_user ON %I AS RESTRICTIVE FOR SELECT TO contaai_llm '
+      'USING (user_id = app_user_id())',
+      v_table
+    );
+  END LOOP;
+END;
+$$;
+
+-- transaction_tags não tem user_id: vale pela tag
+ALTER TABLE transaction_tags ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS all_rows ON transaction_tags;
+CREATE POLICY all_rows ON transaction_tags USING (true) WITH CHECK (true);
+
+DROP POLICY IF EXISTS llm_current_user ON transaction_tags;
+CREATE POLICY llm_current_user ON transaction_tags AS RESTRICTIVE FOR SELECT TO contaai_llm
+  USING (EXISTS (SELECT 1 FROM tags t WHERE t.id = tag_id AND t.user_id = app_user_id()));